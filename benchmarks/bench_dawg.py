@@ -0,0 +1,28 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Nodes, memory and completion latency of a tree before and after the
+minimization into a Dawg, on the grammar of bench_tree where every command
+repeats the same tail of options.
+
+Run from the repository root with: python -m benchmarks.bench_dawg
+"""
+
+from pyrl_complete.parser import Tree
+from .bench_tree import STATEMENTS, make_parser, measure, report
+
+
+def main():
+    parser = make_parser()
+    tree, tree_size = measure(lambda: Tree(parser.iter_paths()))
+    dawg, dawg_size = measure(tree.minimize)
+    before, after = dawg.source_nodes, len(dawg)
+    print(f"{STATEMENTS} statements, {tree.root.count} paths")
+    print(f"nodes: {before} before, {after} after, "
+          f"{before / after:.1f}x fewer")
+    report("Tree", tree, tree_size, before)
+    report("Dawg", dawg, dawg_size, after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Latency of the fuzzy completion, against a naive search.
+
+"naive" computes the edit distance between the input and the start of the
+expression of every node of the tree, "trie" is Tree.get_predictions with
+max_edits, which leaves a branch as soon as its edits exceed the budget.
+
+Run from the repository root with: python -m benchmarks.bench_fuzzy
+"""
+
+import timeit
+from pyrl_complete.parser import Tree
+from .bench_tree import make_parser
+
+INPUTS = ["cmd_bc shwo", "cmd_bdc st -v", "cdm_bcd set -o val ",
+          "cmd_bcd gte -v -f"]
+NUMBER = 1
+
+
+def prefix_distance(expression: str, input: str) -> int:
+    "Edit distance between input and the closest prefix of expression"
+    previous = list(range(len(expression) + 1))
+    for i, c in enumerate(input, 1):
+        current = [i]
+        for j, e in enumerate(expression, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (c != e)))
+        previous = current
+    return min(previous)
+
+
+def naive(nodes, input: str, max_edits: int):
+    return [n for n in nodes
+            if prefix_distance(n.expression(), input) <= max_edits]
+
+
+def all_nodes(tree: Tree):
+    nodes = [tree.root]
+    for node in nodes:
+        nodes.extend(node.children.values())
+    return nodes
+
+
+def main():
+    parser = make_parser()
+    tree = Tree(parser.iter_paths())
+    nodes = all_nodes(tree)
+    print(f"{tree.root.count} paths, {len(nodes)} nodes")
+    for max_edits in (1, 2):
+        before = timeit.timeit(
+            lambda: [naive(nodes, i, max_edits) for i in INPUTS],
+            number=NUMBER
+        ) / NUMBER / len(INPUTS)
+        after = timeit.timeit(
+            lambda: [tree.get_predictions(i, max_edits=max_edits)
+                     for i in INPUTS],
+            number=NUMBER
+        ) / NUMBER / len(INPUTS)
+        print(f"max_edits={max_edits}: naive {before * 1e3:9.1f} ms, "
+              f"trie {after * 1e3:8.3f} ms, {before / after:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
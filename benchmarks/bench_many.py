@@ -0,0 +1,88 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Throughput of the batch completion API against a per-call loop, on logged
+command lines and when replaying them one keystroke at a time.
+
+"loop" calls Tree.get_predictions for every input, with the completion
+cache on as it would be in a CLI, "many" makes one call to
+Tree.get_predictions_many with all the inputs. The keystrokes repeat the
+prefixes of each line, which the cache serves as well: the full lines
+show what the batch saves by sharing the prefixes of different lines.
+
+Run from the repository root with: python -m benchmarks.bench_many
+"""
+
+import random
+import string
+import time
+from pyrl_complete.parser import Parser, Tree
+
+STATEMENTS = 500
+LINES = 2000
+SEED = 12345
+
+
+def word(i: int) -> str:
+    return "".join(string.ascii_lowercase[int(d)] for d in str(i))
+
+
+def make_parser() -> Parser:
+    parser = Parser()
+    parser.parse("".join(
+        f"cmd_{word(i)} (show | set | get) (alpha | beta | gamma)"
+        " [-v] [-o ?] [-f ?];\n"
+        for i in range(STATEMENTS)
+    ))
+    return parser
+
+
+def make_lines(paths):
+    "LINES command lines, filling the placeholders"
+    rnd = random.Random(SEED)
+    return [
+        " ".join(rnd.choice(paths)).replace("?", word(rnd.randrange(100)))
+        for _ in range(LINES)
+    ]
+
+
+def keystrokes(lines):
+    "Every keystroke of the lines"
+    return [line[:i] for line in lines for i in range(len(line) + 1)]
+
+
+def throughput(run, inputs) -> float:
+    start = time.perf_counter()
+    run(inputs)
+    return len(inputs) / (time.perf_counter() - start)
+
+
+def compare(tree: Tree, title: str, inputs):
+    def loop(inputs):
+        return [tree.get_predictions(i) for i in inputs]
+
+    tree.cache.clear()
+    tree.prediction_cache.clear()
+    expected = loop(inputs)
+    assert tree.get_predictions_many(inputs) == expected
+    tree.cache.clear()
+    tree.prediction_cache.clear()
+    before = throughput(loop, inputs)
+    after = throughput(tree.get_predictions_many, inputs)
+    print(f"{title}: {len(inputs)} inputs")
+    print(f"  loop: {before:10.0f} inputs/s")
+    print(f"  many: {after:10.0f} inputs/s")
+    print(f"  speedup: {after / before:.1f}x")
+
+
+def main():
+    parser = make_parser()
+    tree = Tree(parser.iter_paths())
+    lines = make_lines(parser.paths)
+    print(f"{tree.root.count} paths")
+    compare(tree, "full lines", lines)
+    compare(tree, "keystrokes", keystrokes(lines))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Per-parse cost of the grammar parser.
+
+"before" rebuilds the lexer and the LALR parser on every call, as
+Parser.parse used to do, "after" is the current Parser.parse which
+builds them once per process.
+
+Run from the repository root with: python -m benchmarks.bench_parse
+"""
+
+import tempfile
+import timeit
+from ply import lex, yacc
+from pyrl_complete.parser import Parser, rules
+
+RULES = """get (status | version);
+set (user | group) -name ? [-id ?];
+show [config | interfaces] [-v];
+exit;
+"""
+NUMBER = 200
+
+
+def parse_before(data: str, outputdir: str):
+    lex.lex(module=rules)
+    parser = yacc.yacc(
+        module=rules, tabmodule="bench_parsetab", outputdir=outputdir,
+        errorlog=yacc.NullLogger()
+    )
+    # the statements are collected on the parser, as in Parser._parse
+    parser.statements = []
+    parser.texts = []
+    parser.statement_start = 0
+    parser.parse(data)
+    return parser.statements
+
+
+def main():
+    with tempfile.TemporaryDirectory() as outputdir:
+        before = timeit.timeit(
+            lambda: parse_before(RULES, outputdir), number=NUMBER
+        )
+    parser = Parser()
+    parser.parse(RULES)  # first call builds the engine
+    after = timeit.timeit(lambda: parser.parse(RULES), number=NUMBER)
+    print(f"before: {before / NUMBER * 1e6:10.1f} us/parse")
+    print(f"after:  {after / NUMBER * 1e6:10.1f} us/parse")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Cost of Node.matches on placeholder dense grammars.
+
+"before" is the string matcher Node.matches used to be: it removed the
+word filling each placeholder from the input and normalized both strings
+with regular expressions. "after" is the current token matcher. Both are
+run over every node of the tree, for a plain grammar and for grammars with
+more and more placeholders per statement.
+
+Run from the repository root with: python -m benchmarks.bench_placeholders
+"""
+
+import re
+import string
+import timeit
+from pyrl_complete.common.string_utils import remove_first_word
+from pyrl_complete.parser import Parser, Tree
+
+STATEMENTS = 50
+NUMBER = 5
+OPTIONS = ["name", "id", "host", "port", "user", "zone"]
+
+
+def word(i: int) -> str:
+    return "".join(string.ascii_lowercase[int(d)] for d in str(i))
+
+
+def make_tree(placeholders: int) -> Tree:
+    "Every statement has all the options, the first ones with a '?'"
+    options = " ".join(
+        f"-{o} ?" if i < placeholders else f"-{o}"
+        for i, o in enumerate(OPTIONS)
+    )
+    parser = Parser()
+    parser.parse("".join(
+        f"cmd_{word(i)} (add | del) {options};\n" for i in range(STATEMENTS)
+    ))
+    return Tree(parser.iter_paths())
+
+
+def inputs(placeholders: int):
+    values = " ".join(
+        f"-{o} val_{word(i)}" if i < placeholders else f"-{o}"
+        for i, o in enumerate(OPTIONS)
+    )
+    line = f"cmd_{word(7)} add {values}"
+    return [line[:i] for i in range(0, len(line) + 1, 3)]
+
+
+def matches_before(node, input: str) -> bool:
+    exp = node.expression()
+    placeholders = [i for i, c in enumerate(exp) if c == "?"]
+    if not placeholders:
+        return exp.startswith(input.lower())
+    input = re.sub(r"\s+", " ", input)
+    for removed, p in enumerate(placeholders):
+        input = remove_first_word(input, p - removed)
+    exp = exp.replace("?", "")
+    exp = re.sub(r"\s+", " ", exp)
+    input = re.sub(r"\s+", " ", input)
+    return exp.startswith(input.lower())
+
+
+def all_nodes(tree: Tree):
+    nodes = [tree.root]
+    for node in nodes:
+        nodes.extend(node.children.values())
+    return nodes
+
+
+def scan(nodes, lines, matches):
+    for line in lines:
+        for node in nodes:
+            matches(node, line)
+
+
+def main():
+    print("placeholders   nodes      before       after  speedup")
+    for placeholders in range(len(OPTIONS) + 1):
+        tree = make_tree(placeholders)
+        nodes = all_nodes(tree)
+        lines = inputs(placeholders)
+        calls = NUMBER * len(lines) * len(nodes)
+        before = timeit.timeit(
+            lambda: scan(nodes, lines, matches_before), number=NUMBER
+        ) / calls
+        after = timeit.timeit(
+            lambda: scan(nodes, lines, lambda n, i: n.matches(i)),
+            number=NUMBER
+        ) / calls
+        print(f"{placeholders:12d} {len(nodes):7d} "
+              f"{before * 1e6:8.2f} us {after * 1e6:8.2f} us "
+              f"{before / after:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
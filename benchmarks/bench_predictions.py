@@ -0,0 +1,61 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Latency of Tree.get_predictions on a deep grammar, where every command has
+a long tail of options: the level ordered search against collecting every
+matching node and keeping the shallowest, as get_predictions used to.
+
+Run from the repository root with: python -m benchmarks.bench_predictions
+"""
+
+import timeit
+from pyrl_complete.parser import Parser, Tree, matching
+from pyrl_complete.parser.tree import _children, _segment
+from .bench_many import word
+
+STATEMENTS = 200
+INPUTS = ["", "cmd_b", "cmd_bc ", "cmd_bc set ", "cmd_bc set -a x "]
+NUMBER = 5
+
+
+def make_parser() -> Parser:
+    options = " ".join(f"[-{c} ?]" for c in "abcdef")
+    parser = Parser()
+    parser.parse("".join(
+        f"cmd_{word(i)} (show | set | get) {options};\n"
+        for i in range(STATEMENTS)
+    ))
+    return parser
+
+
+def collect_all(tree: Tree, input: str):
+    "The predictions as the shallowest of all the matching nodes"
+    matches = matching.iter_matches(tree.root, input, _children, _segment)
+    return [n.expression() for n in matching.shallowest(matches)]
+
+
+def level_ordered(tree: Tree, input: str):
+    tree.prediction_cache.clear()
+    return tree.get_predictions(input)
+
+
+def latency(search, tree: Tree, input: str) -> float:
+    "Seconds per call"
+    return timeit.timeit(lambda: search(tree, input), number=NUMBER) / NUMBER
+
+
+def main():
+    parser = make_parser()
+    tree = Tree(parser.iter_paths())
+    print(f"{tree.root.count} paths")
+    for input in INPUTS:
+        assert collect_all(tree, input) == level_ordered(tree, input)
+        before = latency(collect_all, tree, input)
+        after = latency(level_ordered, tree, input)
+        print(f"{input!r:20s} all nodes {before * 1e3:9.3f} ms, "
+              f"level ordered {after * 1e3:9.3f} ms "
+              f"({before / after:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
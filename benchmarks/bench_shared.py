@@ -0,0 +1,92 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Memory of pre-forked workers answering completions from a large grammar:
+each worker building its own Tree, against all of them attaching to one
+SharedTree.
+
+The workers are forked and replay a few queries, then report their
+proportional set size (PSS, from /proc/self/smaps_rollup, so Linux only):
+the pages shared by n processes count 1/n in each, and the sum over the
+workers is the memory they really use together.
+
+Run from the repository root with: python -m benchmarks.bench_shared
+"""
+
+import multiprocessing
+from pyrl_complete.parser import Parser, SharedTree, Tree
+from .bench_startup import make_rules
+
+WORKERS = (1, 2, 4, 8)
+QUERIES = ("cmd_b ", "cmd_bc s", "cmd_cd get -o x ", "cmd_d")
+
+
+def pss() -> int:
+    "Proportional set size of this process, in kB"
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _own_tree(rules: str, ready, done, sizes):
+    parser = Parser()
+    parser.parse(rules)
+    tree = Tree(parser.iter_paths())
+    for query in QUERIES:
+        tree.get_predictions(query)
+    _report(ready, done, sizes)
+
+
+def _shared_tree(name: str, ready, done, sizes):
+    with SharedTree(name) as tree:
+        for query in QUERIES:
+            tree.get_predictions(query)
+        _report(ready, done, sizes)
+
+
+def _report(ready, done, sizes):
+    # every worker is measured while all of them are alive
+    ready.wait()
+    sizes.put(pss())
+    done.wait()
+
+
+def total_pss(target, arg, workers: int) -> int:
+    context = multiprocessing.get_context("fork")
+    ready = context.Barrier(workers)
+    done = context.Barrier(workers)
+    sizes = context.Queue()
+    processes = [
+        context.Process(target=target, args=(arg, ready, done, sizes))
+        for _ in range(workers)
+    ]
+    for p in processes:
+        p.start()
+    total = sum(sizes.get() for _ in processes)
+    for p in processes:
+        p.join()
+    return total
+
+
+def main():
+    rules = make_rules()
+    parser = Parser()
+    parser.parse(rules)
+    shared = SharedTree.create(Tree(parser.iter_paths()))
+    del parser
+    print(f"{len(shared)} nodes, {len(shared._view) // 1024} kB shared")
+    try:
+        for workers in WORKERS:
+            own = total_pss(_own_tree, rules, workers)
+            attached = total_pss(_shared_tree, shared.shm_name, workers)
+            print(f"{workers} workers: own Tree {own / 1024:8.1f} MB, "
+                  f"SharedTree {attached / 1024:8.1f} MB")
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+if __name__ == "__main__":
+    main()
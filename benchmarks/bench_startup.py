@@ -0,0 +1,82 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Startup time and peak RSS until the first completion, for a large grammar:
+parsing the .prl file and building a Tree, against memory mapping the
+compiled .prlc file.
+
+Each mode runs in a fresh interpreter, so that imports and memory are
+measured from scratch.
+
+Run from the repository root with: python -m benchmarks.bench_startup
+"""
+
+import os
+import string
+import subprocess
+import sys
+import tempfile
+
+STATEMENTS = 3000
+
+
+def word(i: int) -> str:
+    return "".join(string.ascii_lowercase[int(d)] for d in str(i))
+
+
+def make_rules() -> str:
+    return "".join(
+        f"cmd_{word(i)} (show | set | get) [-v] [-o ?] [-f ?];\n"
+        for i in range(STATEMENTS)
+    )
+
+
+CHILD = """
+import resource, sys, time
+start = time.perf_counter()
+if sys.argv[1] == "parse":
+    from pyrl_complete.parser import Parser, Tree
+    parser = Parser()
+    parser.parse(open(sys.argv[2]).read())
+    tree = Tree(parser.iter_paths())
+else:
+    from pyrl_complete.parser import compiled
+    tree = compiled.load(sys.argv[2])
+tree.get_predictions("cmd_b ")
+elapsed = time.perf_counter() - start
+try:
+    # ru_maxrss survives exec on linux and would report the parent peak
+    with open("/proc/self/status") as f:
+        rss = [int(line.split()[1]) for line in f if line.startswith("VmHWM")][0]
+except OSError:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(f"{elapsed * 1000:.1f} {rss}")
+"""
+
+
+def run(mode: str, path: str):
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, mode, path],
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+    return float(out[0]), int(out[1])
+
+
+def main():
+    from pyrl_complete.apps.compiler import compile_rules
+    with tempfile.TemporaryDirectory() as tmp:
+        rules = os.path.join(tmp, "rules.prl")
+        output = os.path.join(tmp, "rules.prlc")
+        with open(rules, "w") as f:
+            f.write(make_rules())
+        tree = compile_rules(rules, output)
+        print(f"{tree.root.count} paths, {os.path.getsize(output)} bytes "
+              "compiled")
+        for mode, path in (("parse", rules), ("mapped", output)):
+            elapsed, rss = run(mode, path)
+            print(f"{mode:7s} first completion after {elapsed:8.1f} ms, "
+                  f"peak RSS {rss / 1024:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Throughput of a SnapshotTree queried by many threads, while the grammar is
+reloaded in the background.
+
+The same keystrokes are shared out among the threads, so the work is the
+same for any number of threads. The reader threads take no lock, so the
+throughput grows with the number of threads on a free-threaded build of
+CPython; with the GIL it stays about flat.
+
+Run from the repository root with: python -m benchmarks.bench_threads
+"""
+
+import threading
+import time
+from pyrl_complete.parser import SnapshotTree
+from .bench_many import keystrokes, make_lines, make_parser
+
+THREADS = (1, 2, 4, 8)
+INPUTS = 4000  # keystrokes replayed, shared out among the threads
+RELOAD_EVERY = 0.05  # seconds
+
+
+def throughput(tree: SnapshotTree, paths, inputs, threads: int) -> float:
+    stop = threading.Event()
+
+    def reload():
+        while not stop.wait(RELOAD_EVERY):
+            tree.reload(paths)
+
+    def read(share):
+        for i in share:
+            tree.get_predictions(i)
+
+    readers = [
+        threading.Thread(target=read, args=(inputs[k::threads],))
+        for k in range(threads)
+    ]
+    reloader = threading.Thread(target=reload)
+    reloader.start()
+    start = time.perf_counter()
+    for r in readers:
+        r.start()
+    for r in readers:
+        r.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    reloader.join()
+    return len(inputs) / elapsed
+
+
+def main():
+    parser = make_parser()
+    paths = list(parser.iter_paths())
+    inputs = keystrokes(make_lines(paths))[:INPUTS]
+    tree = SnapshotTree(paths)
+    print(f"{len(inputs)} inputs, {len(paths)} paths")
+    base = None
+    for threads in THREADS:
+        rate = throughput(tree, paths, inputs, threads)
+        base = base or rate
+        print(f"{threads} threads: {rate:10.0f} inputs/s "
+              f"({rate / base:.1f}x), version {tree.snapshot.version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Memory and completion latency of the completion trees on a large grammar:
+the object Tree against the array backed CompactTree.
+
+Run from the repository root with: python -m benchmarks.bench_tree
+"""
+
+import gc
+import string
+import timeit
+import tracemalloc
+from pyrl_complete.parser import Parser, Tree
+from pyrl_complete.parser.compact import CompactTree
+
+STATEMENTS = 2000
+INPUTS = ["", "cmd_b", "cmd_bc ", "cmd_bcd set -o val ", "cmd_bcd get -v -f"]
+NUMBER = 5
+
+
+def word(i: int) -> str:
+    return "".join(string.ascii_lowercase[int(d)] for d in str(i))
+
+
+def make_parser() -> Parser:
+    parser = Parser()
+    parser.parse("".join(
+        f"cmd_{word(i)} (show | set | get) [-v] [-o ?] [-f ?];\n"
+        for i in range(STATEMENTS)
+    ))
+    return parser
+
+
+def measure(build):
+    "Returns the object built and the memory it retains, in bytes"
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def latency(tree, method: str) -> float:
+    "Average seconds per call over INPUTS, without the completion cache"
+    call = getattr(tree, method)
+    caches = [
+        getattr(tree, name) for name in ("cache", "prediction_cache")
+        if hasattr(tree, name)
+    ]
+
+    def run():
+        for i in INPUTS:
+            for cache in caches:
+                cache.clear()
+            call(i)
+
+    total = timeit.timeit(run, number=NUMBER)
+    return total / NUMBER / len(INPUTS)
+
+
+def report(name: str, tree, size: int, nodes: int):
+    print(f"{name:12s} {size / 2**20:8.1f} MB "
+          f"{size / nodes:8.1f} B/node "
+          f"{latency(tree, 'get_predictions') * 1e3:9.3f} ms/prediction "
+          f"{latency(tree, 'get_suggestions') * 1e3:9.3f} ms/suggestion")
+
+
+def main():
+    parser = make_parser()
+    tree, tree_size = measure(lambda: Tree(parser.iter_paths()))
+    compact, compact_size = measure(
+        lambda: CompactTree(parser.iter_paths())
+    )
+    nodes = len(compact)
+    print(f"{STATEMENTS} statements, {tree.root.count} paths, "
+          f"{nodes} nodes")
+    report("Tree", tree, tree_size, nodes)
+    report("CompactTree", compact, compact_size, nodes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import argparse
+import os
+from pyrl_complete.parser import Parser, Tree
+from pyrl_complete.parser import compiled
+
+
+def compile_rules(rules_path: str, output_path: str) -> Tree:
+    """Parses a .prl file and writes its compiled tree to output_path.
+
+    Args:
+        rules_path: the rules file.
+        output_path: the .prlc file to write.
+
+    Returns:
+        The completion tree that was compiled.
+    """
+    with open(rules_path, "r") as f:
+        rules_text = f.read()
+    parser = Parser()
+    parser.parse(rules_text)
+    tree = Tree(parser.iter_paths())
+    compiled.write(tree, output_path)
+    return tree
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        prog="pyrl-compile",
+        description="Compiles a rules file into a binary completion tree",
+    )
+    arg_parser.add_argument("rules", help="the .prl rules file")
+    arg_parser.add_argument(
+        "-o", "--output",
+        help="the compiled file, by default the rules file with a .prlc "
+             "extension",
+    )
+    args = arg_parser.parse_args(argv)
+    output = args.output or os.path.splitext(args.rules)[0] + ".prlc"
+    tree = compile_rules(args.rules, output)
+    print(f"{args.rules}: {tree.root.count} paths compiled to {output} "
+          f"({os.path.getsize(output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
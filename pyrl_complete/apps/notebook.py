@@ -276,9 +276,10 @@ def handle_write_rules():
 def handle_parse_rules():
     """Handles the 'Parse Rules' button click.
 
-    Takes the text from the rule editor, parses it to generate command paths,
-    builds a completion tree, and updates the UI to reflect the newly parsed
-    rules. It then switches to the 'Test Rules' tab.
+    Takes the text from the rule editor, parses the statements that changed
+    since the last parse, patches the completion tree with their paths, and
+    updates the UI to reflect the newly parsed rules. It then switches to
+    the 'Test Rules' tab.
     """
     log_content = _context["log_content"]
     write_paths_label = _context["write_paths_label"]
@@ -291,9 +292,15 @@ def handle_parse_rules():
     parser = _context["parser"]
     rules_editor = _context["rules_editor"]
     rules_text = rules_editor.get("1.0", tk.END)
-    parser.parse(rules_text)  # Assuming parser.parse() takes the rules text
-    _context["tree"] = Tree(parser.paths)
-    num_paths = len(parser.paths)
+    if "tree" not in _context:
+        _context["tree"] = Tree([])
+        _context["session"] = _context["tree"].session()
+    tree = _context["tree"]
+    # only the statements changed since the last parse are parsed again,
+    # and the tree is patched in place
+    added, removed = parser.update(rules_text)
+    tree.patch(added, removed)
+    num_paths = tree.root.count
     log_content.insert(tk.END,
                        f"Rules parsed successfully: generated "
                        f"{num_paths} paths from rules.")
@@ -334,9 +341,10 @@ def input_changed(event):
     # fill the prediction box
     predictions = []
     input = event.widget.get()
-    if "tree" in _context:
-        tree = _context["tree"]
-        predictions = tree.get_predictions(input)
+    if "session" in _context:
+        # the session reuses the work done for the previous keystroke
+        session = _context["session"]
+        predictions = session.get_predictions(input)
     test_predictions = _context["test_predictions"] 
     test_predictions.delete(0, tk.END)
     for prediction in predictions:
@@ -0,0 +1,154 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Replays a corpus of command lines against a grammar, in parallel.
+
+Every line of the corpus is completed against the grammar and written as a
+JSON object on its own line, in corpus order:
+
+    {"input": "set user ", "predictions": ["set user -name ?"]}
+
+The corpus is cut in chunks which are fanned out over a process pool.
+Each worker loads the tree once, when it starts: only the path of the rules
+and the chunks of lines travel between the processes, never the tree.
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, TextIO, Union
+from pyrl_complete.parser import CompactTree, Parser, Tree
+from pyrl_complete.parser import compiled
+
+# the tree of the worker process, set by _init_worker
+_tree: Union[Tree, CompactTree, None] = None
+_suggestions = False
+
+
+def load_tree(rules_path: str) -> Union[Tree, CompactTree]:
+    "Loads a compiled .prlc file, or parses a rules file"
+    if rules_path.endswith(".prlc"):
+        return compiled.load(rules_path)
+    with open(rules_path, "r") as f:
+        rules_text = f.read()
+    parser = Parser()
+    parser.parse(rules_text)
+    return Tree(parser.iter_paths())
+
+
+def _init_worker(rules_path: str, suggestions: bool):
+    global _tree, _suggestions
+    _tree = load_tree(rules_path)
+    _suggestions = suggestions
+
+
+def _replay_chunk(lines: List[str]) -> List[str]:
+    "Completes a chunk of lines, returning one JSON record per line"
+    predictions = _tree.get_predictions_many(lines)
+    if _suggestions:
+        suggestions = _tree.get_suggestions_many(lines)
+    records = []
+    for i, line in enumerate(lines):
+        record = {"input": line, "predictions": predictions[i]}
+        if _suggestions:
+            record["suggestions"] = suggestions[i]
+        records.append(json.dumps(record))
+    return records
+
+
+def _chunks(lines: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    it = iter(lines)
+    while chunk := list(islice(it, chunk_size)):
+        yield chunk
+
+
+def replay(
+    rules_path: str,
+    lines: Iterable[str],
+    out: TextIO,
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    suggestions: bool = False,
+) -> int:
+    """Replays the lines against the rules, writing JSONL records to out.
+
+    Args:
+        rules_path: a .prl rules file or a compiled .prlc file.
+        lines: the command lines, without the newline.
+        out: where the records are written, in the order of the lines.
+        workers: the number of processes, by default the number of CPUs.
+        chunk_size: the number of lines sent to a worker at a time.
+        suggestions: also write the suggestions of each line.
+
+    Returns:
+        The number of lines replayed.
+    """
+    workers = workers or os.cpu_count() or 1
+    count = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(rules_path, suggestions),
+    ) as executor:
+        # a few chunks in flight per worker, so the corpus is streamed
+        pending = deque()
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(executor.submit(_replay_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                count += _write(pending.popleft().result(), out)
+        while pending:
+            count += _write(pending.popleft().result(), out)
+    return count
+
+
+def _write(records: List[str], out: TextIO) -> int:
+    for record in records:
+        out.write(record)
+        out.write("\n")
+    return len(records)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        prog="pyrl_replay",
+        description="Replays a corpus of command lines against a grammar "
+                    "and writes the completions as JSON lines",
+    )
+    arg_parser.add_argument(
+        "rules", help="the .prl rules file, or a compiled .prlc file"
+    )
+    arg_parser.add_argument("corpus", help="the command lines, one per line")
+    arg_parser.add_argument(
+        "-o", "--output", help="the JSONL file, by default standard output"
+    )
+    arg_parser.add_argument(
+        "-w", "--workers", type=int,
+        help="number of worker processes, by default the number of CPUs",
+    )
+    arg_parser.add_argument(
+        "--chunk-size", type=int, default=1000,
+        help="lines sent to a worker at a time",
+    )
+    arg_parser.add_argument(
+        "--suggestions", action="store_true",
+        help="also write the suggestions of each line",
+    )
+    args = arg_parser.parse_args(argv)
+    with open(args.corpus, "r") as corpus:
+        lines = (line.rstrip("\r\n") for line in corpus)
+        if args.output:
+            with open(args.output, "w") as out:
+                count = replay(args.rules, lines, out, args.workers,
+                               args.chunk_size, args.suggestions)
+        else:
+            count = replay(args.rules, lines, sys.stdout, args.workers,
+                           args.chunk_size, args.suggestions)
+    print(f"{args.corpus}: {count} lines replayed", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -62,7 +62,7 @@ def find_all_char_positions(text: str, char_to_find: chr) -> List[int]:
 
 
 def fill_placeholders_with_words(prediction: str, input: str) -> str:
-    """Replaces placeholders ('?') in a prediction string with corresponding words from an input string.
+    """Replaces placeholders ('?' or '?name') in a prediction string with corresponding words from an input string.
 
     This function iterates through placeholders in the `prediction` string. For each
     placeholder, it finds the next available "word" in the `input` string, starting
@@ -107,6 +107,10 @@ def fill_placeholders_with_words(prediction: str, input: str) -> str:
         while word_end < len(input) and is_word_char(input[word_end]):
             word_end += 1
         word = input[word_start:word_end]
-        prediction = prediction[:p] + word + prediction[p+1:]
+        # a named placeholder, e.g. ?host, is replaced with its name
+        p_end = p + 1
+        while p_end < len(prediction) and is_word_char(prediction[p_end]):
+            p_end += 1
+        prediction = prediction[:p] + word + prediction[p_end:]
         placeholders = find_all_char_positions(prediction, "?")
     return prediction
@@ -2,13 +2,29 @@
 
 from . import rules
 from .rules import Paths
+from . import grammar
 from . import parser
 from . import tree
+from . import compact
+from . import dawg
+from . import ranking
+from . import providers
+from . import aio
+from . import snapshot
+from . import shared
 
 # redefinition to simplify namespace
+Grammar = grammar.Grammar
 Parser = parser.Parser
 Node = tree.Node
 Tree = tree.Tree
+CompactTree = compact.CompactTree
+Dawg = dawg.Dawg
+UsageRanking = ranking.UsageRanking
+Providers = providers.Providers
+AsyncCompleter = aio.AsyncCompleter
+SnapshotTree = snapshot.SnapshotTree
+SharedTree = shared.SharedTree
 
 
 def clear():
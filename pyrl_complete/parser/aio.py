@@ -0,0 +1,116 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Completion for asyncio front ends.
+
+The completions are read from the lazy iterators of a tree (see
+Tree.iter_suggestions) a chunk at a time, on a worker thread of the
+completer: the descent of the tree, the chunks and the ranking and filling
+of the predictions never run on the event loop. The queries run on the
+worker one at a time, as the trees and sessions are not thread-safe.
+A query started while an older one is still running supersedes it, and
+the older one stops at its next chunk without delivering anything.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterator, List, Optional
+
+
+class AsyncCompleter:
+    """
+    Asynchronous get_suggestions and get_predictions on a tree: a Tree, a
+    CompletionSession, or any tree with iter_suggestions and
+    iter_predictions. Each call returns None if a newer call superseded
+    it, and can be cancelled as any asyncio task. The tree must not be
+    changed on another thread while a query runs: call close when done.
+    """
+
+    def __init__(self, tree, chunk_size: int = 256):
+        self.tree = tree
+        self.chunk_size = chunk_size
+        self._latest = 0  # number of the latest query
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="AsyncCompleter"
+        )
+
+    def close(self):
+        "Stops the worker thread, once the queries started have finished"
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    async def _collect(
+        self, start: Callable[[], Iterator[str]], limit: Optional[int]
+    ) -> Optional[List[str]]:
+        self._latest += 1
+        query = self._latest
+        out: List[str] = []
+        results: Optional[Iterator[str]] = None
+        remaining: Iterator[str] = iter(())
+
+        def first_chunk() -> List[str]:
+            nonlocal results, remaining
+            results = start()
+            remaining = islice(results, limit)
+            return next_chunk()
+
+        def next_chunk() -> List[str]:
+            return list(islice(remaining, self.chunk_size))
+
+        try:
+            chunk = await self._run(first_chunk)
+            while True:
+                out += chunk
+                if len(chunk) < self.chunk_size:
+                    return out
+                if query != self._latest:
+                    return None
+                chunk = await self._run(next_chunk)
+        finally:
+            # stops the search, e.g. on cancellation, on the worker as a
+            # chunk of it may still be running there
+            close = getattr(results, "close", None)
+            if close is not None:
+                try:
+                    self._executor.submit(close)
+                except RuntimeError:
+                    pass  # closed, the generator is dropped instead
+
+    async def get_suggestions(
+        self, input: str, limit: Optional[int] = None
+    ) -> Optional[List[str]]:
+        """
+        Returns a list of suggestions based on the input, at most limit,
+        or None if a newer query superseded this one
+        """
+        return await self._collect(
+            lambda: self.tree.iter_suggestions(input), limit
+        )
+
+    async def get_predictions(
+        self, input: str, limit: Optional[int] = None
+    ) -> Optional[List[str]]:
+        """
+        Returns a list of predictions based on the input, at most limit,
+        or None if a newer query superseded this one. The predictions are
+        ranked and filled as the tree does, if it can.
+        """
+        present = getattr(self.tree, "_present", None)
+        if present is None:
+            return await self._collect(
+                lambda: self.tree.iter_predictions(input), limit
+            )
+        query = self._latest + 1
+        predictions = await self._collect(
+            lambda: self.tree.iter_predictions(input), None
+        )
+        if predictions is None:
+            return None
+        predictions = await self._run(present, predictions, input, limit)
+        if query != self._latest:
+            return None
+        return predictions
@@ -0,0 +1,164 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Bounded LRU cache for completion results.
+"""
+
+import re
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+def normalize(input: str) -> str:
+    """
+    The cache key of an input: whitespace runs collapsed to one space and
+    lowercase, since the matching ignores both.
+    """
+    return re.sub(r"\s+", " ", input).lower()
+
+
+class CompletionCache:
+    """
+    A cache from input strings to completion results, evicting the least
+    recently used entries beyond max_entries entries or max_bytes bytes.
+    The size in bytes is an estimate: the key and the result list, not the
+    nodes it points to, which belong to the tree.
+
+    The counters hits, misses and evictions are cumulative, size and bytes
+    describe the current content.
+    """
+
+    def __init__(self, max_entries: int = 1024,
+                 max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _entry_bytes(key: str, value: List[Any]) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    @property
+    def size(self) -> int:
+        "Number of entries"
+        return len(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, input: str) -> bool:
+        return normalize(input) in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        "Iterates over the normalized keys, least recently used first"
+        return iter(list(self._entries))
+
+    def get(self, input: str) -> Optional[List[Any]]:
+        "Returns the cached result for input, or None"
+        key = normalize(input)
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, input: str, value: List[Any]):
+        "Stores the result for input, evicting old entries if needed"
+        key = normalize(input)
+        self._discard(key)
+        self._entries[key] = value
+        self.bytes += self._entry_bytes(key, value)
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            old_key, old_value = self._entries.popitem(last=False)
+            self.bytes -= self._entry_bytes(old_key, old_value)
+            self.evictions += 1
+
+    def _discard(self, key: str):
+        value = self._entries.pop(key, None)
+        if value is not None:
+            self.bytes -= self._entry_bytes(key, value)
+
+    def discard_if(self, predicate: Callable[[str], bool]):
+        "Drops the entries whose normalized key satisfies predicate"
+        for key in [k for k in self._entries if predicate(k)]:
+            self._discard(key)
+
+    def clear(self):
+        "Drops all the entries, the counters are kept"
+        self._entries.clear()
+        self.bytes = 0
+
+
+class ConcurrentCache:
+    """
+    A cache safe to share between threads without locks, also on
+    free-threaded CPython: every operation is a single dict operation or
+    the rebinding of an attribute.
+
+    The entries live in two generations. New entries go to the young one,
+    and hits in the old one are copied to the young one. When the young
+    generation is full it becomes the old one, dropping the previous old
+    generation: the least recently used entries go first, as in an LRU,
+    and there are at most 2 * (max_entries // 2) entries.
+
+    Concurrent updates may lose an entry or a count, never corrupt the
+    cache: hits and misses are approximate under contention.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._young: Dict[str, Any] = {}
+        self._old: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        "Number of entries"
+        return len(self._young) + len(self._old)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, input: str) -> bool:
+        key = normalize(input)
+        return key in self._young or key in self._old
+
+    def get(self, input: str) -> Optional[Any]:
+        "Returns the cached result for input, or None"
+        key = normalize(input)
+        value = self._young.get(key)
+        if value is None:
+            value = self._old.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._store(key, value)
+        self.hits += 1
+        return value
+
+    def put(self, input: str, value: Any):
+        "Stores the result for input"
+        self._store(normalize(input), value)
+
+    def _store(self, key: str, value: Any):
+        young = self._young
+        young[key] = value
+        if len(young) >= max(1, self.max_entries // 2):
+            self._old = young
+            self._young = {}
+
+    def clear(self):
+        "Drops all the entries, the counters are kept"
+        self._young = {}
+        self._old = {}
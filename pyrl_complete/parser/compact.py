@@ -0,0 +1,225 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Array backed completion tree.
+
+The tree is stored breadth first in parallel arrays of unsigned ints, the
+same layout as the compiled .prlc files:
+
+    symbols[i]   id of the name of node i in the interned names table
+    parents[i]   index of the parent of node i (the root points to itself)
+    children[i]  the children of node i are children[i] .. children[i+1]-1
+
+Node 0 is the root, and symbol 0 is its empty name. A node costs 12 bytes,
+plus its name once per distinct name, instead of a Python object with a
+children dict.
+"""
+
+from array import array
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from . import matching
+from .tree import Tree
+
+
+def flatten(tree: Tree) -> Tuple[array, array, array, List[str]]:
+    """
+    Flattens a tree in breadth first order.
+
+    Returns:
+        The symbols, parents and children arrays and the list of interned
+        symbol names.
+    """
+    names: List[str] = [""]
+    ids: Dict[str, int] = {"": 0}
+    symbols = array("I", [0])
+    parents = array("I", [0])
+    children = array("I", [1])
+    queue = deque([tree.root])
+    index = 0
+    while queue:
+        node = queue.popleft()
+        for child in node.children.values():
+            if child.name not in ids:
+                ids[child.name] = len(names)
+                names.append(child.name)
+            symbols.append(ids[child.name])
+            parents.append(index)
+            queue.append(child)
+        children.append(children[-1] + len(node.children))
+        index += 1
+    return symbols, parents, children, names
+
+
+def _build(paths: Iterable[List[str]]):
+    """
+    Builds the arrays straight from the paths, without Node objects.
+    The nodes are first numbered in insertion order and linked in sibling
+    lists, then renumbered breadth first.
+    """
+    names: List[str] = [""]
+    ids: Dict[str, int] = {"": 0}
+    symbol = array("I", [0])
+    first_child = array("i", [-1])
+    last_child = array("i", [-1])
+    next_sibling = array("i", [-1])
+    lookup: Dict[int, int] = {}  # (parent << 32 | symbol) -> node
+    for path in paths:
+        node = 0
+        for name in path:
+            s = ids.get(name)
+            if s is None:
+                s = ids[name] = len(names)
+                names.append(name)
+            key = node << 32 | s
+            child = lookup.get(key)
+            if child is None:
+                child = lookup[key] = len(symbol)
+                symbol.append(s)
+                first_child.append(-1)
+                last_child.append(-1)
+                next_sibling.append(-1)
+                if first_child[node] < 0:
+                    first_child[node] = child
+                else:
+                    next_sibling[last_child[node]] = child
+                last_child[node] = child
+            node = child
+    del lookup, last_child
+    symbols = array("I", [0])
+    parents = array("I", [0])
+    children = array("I", [1])
+    queue = deque([0])
+    index = 0
+    while queue:
+        node = queue.popleft()
+        child = first_child[node]
+        count = 0
+        while child >= 0:
+            symbols.append(symbol[child])
+            parents.append(index)
+            queue.append(child)
+            child = next_sibling[child]
+            count += 1
+        children.append(children[-1] + count)
+        index += 1
+    return symbols, parents, children, names
+
+
+class CompactTree:
+    """
+    A read-only completion tree stored in flat arrays, with the same
+    get_suggestions and get_predictions methods as Tree.
+    Nodes are identified by their index.
+    """
+
+    def __init__(self, paths: Iterable[List[str]] = ()):
+        self._set_arrays(*_build(paths))
+
+    @classmethod
+    def from_tree(cls, tree: Tree) -> "CompactTree":
+        "Builds a compact copy of an object tree"
+        compact = cls.__new__(cls)
+        compact._set_arrays(*flatten(tree))
+        return compact
+
+    def _set_arrays(self, symbols, parents, children, names):
+        self.symbols = symbols
+        self.parents = parents
+        self.children = children
+        self.names = names
+        self._tokens: Dict[int, Tuple[str, ...]] = {}
+        # the children of the nodes looked up, by first token
+        self._indexes: Dict[int, Dict[str, List[Tuple[int, int]]]] = {}
+
+    def __len__(self) -> int:
+        "Number of nodes, including the root"
+        return len(self.symbols)
+
+    def name(self, node: int) -> str:
+        "The name of a node"
+        return self.names[self.symbols[node]]
+
+    def _segment(self, node: int) -> Tuple[str, ...]:
+        symbol = self.symbols[node]
+        tokens = self._tokens.get(symbol)
+        if tokens is None:
+            tokens = tuple(self.name(node).split())
+            self._tokens[symbol] = tokens
+        return tokens
+
+    def _children(self, node: int) -> range:
+        return range(self.children[node], self.children[node + 1])
+
+    def _lookup(self, node: int, token: str) -> Iterable[Tuple[int, int]]:
+        children = self._children(node)
+        if len(children) < matching.INDEX_MIN:
+            return enumerate(children)
+        index = self._indexes.get(node)
+        if index is None:
+            index = matching.index_children(children, self._segment)
+            self._indexes[node] = index
+        return matching.indexed(index, token)
+
+    def expression(self, node: int) -> str:
+        "Returns the expression of a node, as Node.expression"
+        names = []
+        while node != 0:
+            names.append(self.name(node))
+            node = self.parents[node]
+        return " ".join(reversed(names))
+
+    def find_matching_nodes(self, input: str, subtrees: bool = True):
+        "Yields the (node, depth) pairs matching the input"
+        return matching.iter_matches(
+            0, input, self._children, self._segment, subtrees,
+            lookup=self._lookup
+        )
+
+    def iter_suggestions(self, input: str) -> Iterator[str]:
+        """
+        Yields the suggestions one at a time, the tree is searched only as
+        far as the caller reads
+        """
+        for node, _ in self.find_matching_nodes(input):
+            yield self.expression(node)
+
+    def iter_predictions(self, input: str) -> Iterator[str]:
+        "Yields the predictions one at a time"
+        nodes = matching.shallowest_matches(
+            0, input, self._children, self._segment, lookup=self._lookup
+        )
+        for node in nodes:
+            yield self.expression(node)
+
+    def get_suggestions(
+        self, input: str, limit: Optional[int] = None
+    ) -> List[str]:
+        "Returns a list of suggestions based on the input, at most limit"
+        return list(islice(self.iter_suggestions(input), limit))
+
+    def get_predictions(
+        self, input: str, limit: Optional[int] = None
+    ) -> List[str]:
+        "Returns a list of predictions based on the input, at most limit"
+        return list(islice(self.iter_predictions(input), limit))
+
+    def get_suggestions_many(self, inputs: Iterable[str]) -> List[List[str]]:
+        "Returns the list of suggestions of each input, as Tree does"
+        matches = matching.match_many(
+            0, list(inputs), self._children, self._segment,
+            lookup=self._lookup
+        )
+        return [[self.expression(n) for n, _ in m] for m in matches]
+
+    def get_predictions_many(self, inputs: Iterable[str]) -> List[List[str]]:
+        "Returns the list of predictions of each input, as Tree does"
+        matches = matching.match_many(
+            0, list(inputs), self._children, self._segment, subtrees=False,
+            lookup=self._lookup
+        )
+        return [
+            [self.expression(n) for n in matching.shallowest(m)]
+            for m in matches
+        ]
@@ -0,0 +1,156 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Binary format for a compiled completion tree (.prlc files).
+
+The tree is flattened in breadth first order, so that the children of each
+node are contiguous. All integers are little endian unsigned 32 bits:
+
+    header   magic b"PRLC", version, node count, symbol count, blob size
+    symbols  [node count]       symbol id of the name of each node
+    parents  [node count]       index of the parent (the root points to 0)
+    children [node count + 1]   children of node i are the nodes in
+                                children[i] .. children[i + 1] - 1
+    offsets  [symbol count + 1] symbol s is blob[offsets[s]:offsets[s + 1]]
+    blob     the utf-8 encoded symbol names, each stored once
+
+Node 0 is the root, symbol 0 is the empty name of the root.
+MappedTree answers completions straight from a memory mapped file: nothing
+is parsed and the names are decoded only when a query reaches them.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, Union
+from .compact import CompactTree, flatten
+from .tree import Tree
+
+MAGIC = b"PRLC"
+VERSION = 1
+_HEADER = struct.Struct("<4sIIII")
+
+
+def _to_bytes(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def dumps(tree: Union[Tree, CompactTree]) -> bytes:
+    "Returns the compiled tree, in the .prlc format"
+    if isinstance(tree, CompactTree):
+        symbols, parents, children = tree.symbols, tree.parents, tree.children
+        names = [tree.names[i] for i in range(len(tree.names))]
+    else:
+        symbols, parents, children, names = flatten(tree)
+    encoded = [n.encode("utf-8") for n in names]
+    offsets = array("I", [0])
+    for e in encoded:
+        offsets.append(offsets[-1] + len(e))
+    blob = b"".join(encoded)
+    header = _HEADER.pack(MAGIC, VERSION, len(symbols), len(names), len(blob))
+    return b"".join(
+        [header] + [_to_bytes(v) for v in (symbols, parents, children, offsets)]
+        + [blob]
+    )
+
+
+def write(tree: Union[Tree, CompactTree], path: str):
+    "Writes the compiled tree to path"
+    with open(path, "wb") as f:
+        f.write(dumps(tree))
+
+
+class BufferTree(CompactTree):
+    """
+    A CompactTree over a compiled tree held in a buffer, e.g. a memory map.
+    The arrays are views of the buffer, and the names are decoded when a
+    query reaches them.
+    """
+
+    def __init__(self, buffer, source: str = "buffer"):
+        self._view = memoryview(buffer)
+        if len(self._view) < _HEADER.size:
+            self._view.release()
+            raise ValueError(f"{source} is not a compiled rules file")
+        magic, version, nodes, symbols, blob_size = _HEADER.unpack_from(
+            self._view
+        )
+        if magic != MAGIC or version != VERSION:
+            self._view.release()
+            raise ValueError(f"{source} is not a compiled rules file")
+        start = _HEADER.size
+        symbols_array, start = self._array(start, nodes)
+        parents, start = self._array(start, nodes)
+        children, start = self._array(start, nodes + 1)
+        self.offsets, start = self._array(start, symbols + 1)
+        self.blob = self._view[start:start + blob_size]
+        self._set_arrays(symbols_array, parents, children, _Names(self))
+
+    def _array(self, start: int, length: int):
+        end = start + 4 * length
+        values = self._view[start:end].cast("I")
+        if sys.byteorder != "little":
+            values = array("I", values)
+            values.byteswap()
+        return values, end
+
+    def close(self):
+        "Releases the views of the buffer"
+        for view in (self.symbols, self.parents, self.children,
+                     self.offsets, self.blob):
+            if isinstance(view, memoryview):
+                view.release()
+        self._view.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class MappedTree(BufferTree):
+    "A BufferTree over a memory mapped .prlc file"
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            super().__init__(self._mmap, path)
+        except ValueError:
+            self._mmap.close()
+            raise
+
+    def close(self):
+        "Releases the memory map"
+        super().close()
+        self._mmap.close()
+
+
+class _Names:
+    "The names table of a BufferTree, decoding each name on first use"
+
+    def __init__(self, tree: BufferTree):
+        self._tree = tree
+        self._decoded: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._tree.offsets) - 1
+
+    def __getitem__(self, symbol: int) -> str:
+        name = self._decoded.get(symbol)
+        if name is None:
+            offsets = self._tree.offsets
+            start, end = offsets[symbol], offsets[symbol + 1]
+            name = str(self._tree.blob[start:end], "utf-8")
+            self._decoded[symbol] = name
+        return name
+
+
+def load(path: str) -> MappedTree:
+    "Memory maps a compiled rules file"
+    return MappedTree(path)
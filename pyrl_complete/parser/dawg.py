@@ -0,0 +1,154 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Minimized completion tree, sharing the identical subtrees.
+
+Grammars often repeat the same tail of options under many commands, e.g.
+`[-v] [-o ?] [-f ?]`, and the tree holds a copy of that subtree under each
+of them. Minimization merges the subtrees with the same structure into a
+single one, turning the tree into a directed acyclic word graph (DAWG).
+
+A shared node has more than one parent, so the expression of a match is
+built from the path followed to reach it: the walk goes through Step
+objects, each pointing to the node and to the step it came from.
+"""
+
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from . import matching
+from .tree import Node, Tree
+
+
+class DawgNode:
+    "A node of the minimized tree, possibly shared by many parents"
+
+    __slots__ = ("name", "segment", "children", "final")
+
+    def __init__(self, name: str, children: Tuple["DawgNode", ...],
+                 final: bool):
+        self.name = name
+        self.segment = tuple(name.split())
+        self.children = children
+        self.final = final  # a path ends at this node
+
+
+class Step:
+    "A node of the minimized tree, as reached from the root along a path"
+
+    __slots__ = ("node", "parent")
+
+    def __init__(self, node: DawgNode, parent: Optional["Step"]):
+        self.node = node
+        self.parent = parent
+
+    def expression(self) -> str:
+        "Returns the expression of the node along this path"
+        names = []
+        step = self
+        while step.parent is not None:
+            names.append(step.node.name)
+            step = step.parent
+        return " ".join(reversed(names))
+
+
+def _children(step: Step) -> List[Step]:
+    return [Step(child, step) for child in step.node.children]
+
+
+def _segment(step: Step) -> Tuple[str, ...]:
+    return step.node.segment
+
+
+class Dawg:
+    """
+    A read-only completion tree where the identical subtrees of a Tree are
+    stored once, with the same get_suggestions and get_predictions methods.
+    """
+
+    def __init__(self, tree: Tree):
+        # signature -> shared node; a signature holds the ids of the
+        # children, which are kept alive by the register itself
+        self._register: Dict[tuple, DawgNode] = {}
+        self.source_nodes = 0  # number of nodes of the tree minimized
+        self.root = self._share(tree.root)
+        del self._register
+
+    def _share(self, node: Node) -> DawgNode:
+        self.source_nodes += 1
+        children = tuple(self._share(c) for c in node.children.values())
+        final = node.count > sum(c.count for c in node.children.values())
+        signature = (node.name, final, tuple(id(c) for c in children))
+        shared = self._register.get(signature)
+        if shared is None:
+            shared = DawgNode(node.name, children, final)
+            self._register[signature] = shared
+        return shared
+
+    def __len__(self) -> int:
+        "Number of distinct nodes, including the root"
+        seen = {id(self.root)}
+        stack = [self.root]
+        while stack:
+            for child in stack.pop().children:
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    stack.append(child)
+        return len(seen)
+
+    def iter_paths(self) -> Iterator[List[str]]:
+        "Yields all the paths, depth first"
+        stack = [(self.root, [])]
+        while stack:
+            node, path = stack.pop()
+            if node.final and path:
+                yield path
+            for child in reversed(node.children):
+                stack.append((child, path + [child.name]))
+
+    def find_matching_nodes(self, input: str, subtrees: bool = True):
+        "Yields the (step, depth) pairs matching the input"
+        return matching.iter_matches(
+            Step(self.root, None), input, _children, _segment, subtrees
+        )
+
+    def iter_suggestions(self, input: str) -> Iterator[str]:
+        "Yields the suggestions one at a time"
+        for step, _ in self.find_matching_nodes(input):
+            yield step.expression()
+
+    def iter_predictions(self, input: str) -> Iterator[str]:
+        "Yields the predictions one at a time"
+        steps = matching.shallowest_matches(
+            Step(self.root, None), input, _children, _segment
+        )
+        for step in steps:
+            yield step.expression()
+
+    def get_suggestions(
+        self, input: str, limit: Optional[int] = None
+    ) -> List[str]:
+        "Returns a list of suggestions based on the input, at most limit"
+        return list(islice(self.iter_suggestions(input), limit))
+
+    def get_predictions(
+        self, input: str, limit: Optional[int] = None
+    ) -> List[str]:
+        "Returns a list of predictions based on the input, at most limit"
+        return list(islice(self.iter_predictions(input), limit))
+
+    def get_suggestions_many(self, inputs: Iterable[str]) -> List[List[str]]:
+        "Returns the list of suggestions of each input, as Tree does"
+        matches = matching.match_many(
+            Step(self.root, None), list(inputs), _children, _segment
+        )
+        return [[s.expression() for s, _ in m] for m in matches]
+
+    def get_predictions_many(self, inputs: Iterable[str]) -> List[List[str]]:
+        "Returns the list of predictions of each input, as Tree does"
+        matches = matching.match_many(
+            Step(self.root, None), list(inputs), _children, _segment,
+            subtrees=False
+        )
+        return [
+            [s.expression() for s in matching.shallowest(m)] for m in matches
+        ]
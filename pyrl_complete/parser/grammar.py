@@ -0,0 +1,227 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Graph representation of a parsed grammar.
+
+Each statement is compiled into a small graph of vertices, in the style of
+a Thompson NFA: token vertices carry a word or an option (e.g. "-d ?"),
+epsilon vertices (name None) join alternatives and optional groups. The
+graph is linear in the size of the rules, whereas the list of paths grows
+with the product of the alternatives of each statement.
+"""
+
+from collections.abc import Sequence
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from . import matching
+
+Paths = List[List[str]]  # same as rules.Paths, which imports this module
+
+
+class Vertex:
+    "A vertex of the grammar graph. Epsilon vertices have no name"
+
+    __slots__ = ("name", "next")
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+        self.next: List[Vertex] = []
+
+
+# a partial graph, built by the parser: one entry and one exit vertex
+Fragment = Tuple[Vertex, Vertex]
+
+
+def token(name: str) -> Fragment:
+    "Fragment matching a single word or option"
+    v = Vertex(name)
+    return v, v
+
+
+def sequence(f1: Fragment, f2: Fragment) -> Fragment:
+    "Fragment matching f1 followed by f2"
+    f1[1].next.append(f2[0])
+    return f1[0], f2[1]
+
+
+def choice(f1: Fragment, f2: Fragment) -> Fragment:
+    "Fragment matching either f1 or f2"
+    start, end = Vertex(), Vertex()
+    start.next.extend((f1[0], f2[0]))
+    f1[1].next.append(end)
+    f2[1].next.append(end)
+    return start, end
+
+
+def optional(f: Fragment) -> Fragment:
+    "Fragment matching f or nothing"
+    start, end = Vertex(), Vertex()
+    start.next.extend((f[0], end))
+    f[1].next.append(end)
+    return start, end
+
+
+def iter_statement_paths(statement: Fragment) -> Iterator[List[str]]:
+    """
+    Yields the paths of a statement, in the order of its alternatives.
+    The end of the statement is the only vertex without successors.
+    """
+    path: List[str] = []
+    stack = [(statement[0], 0)]
+    while stack:
+        vertex, size = stack.pop()
+        del path[size:]
+        if vertex.name is not None:
+            path.append(vertex.name)
+        if not vertex.next:
+            yield list(path)
+            continue
+        for n in reversed(vertex.next):
+            stack.append((n, len(path)))
+
+
+class PathsView(Sequence):
+    """
+    A read-only list of paths, enumerated from the grammar graph on first
+    access only.
+    """
+
+    def __init__(self, grammar: "Grammar"):
+        self._grammar = grammar
+        self._paths: Optional[Paths] = None
+
+    def _materialize(self) -> Paths:
+        if self._paths is None:
+            self._paths = list(self._grammar.iter_paths())
+        return self._paths
+
+    def __getitem__(self, index):
+        return self._materialize()[index]
+
+    def __len__(self) -> int:
+        return len(self._materialize())
+
+    def __iter__(self):
+        if self._paths is None:
+            return self._grammar.iter_paths()
+        return iter(self._paths)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(self._materialize())
+
+
+class GraphNode:
+    """
+    A node of the completion trie, built on demand while walking the
+    grammar graph. It stands for all the token vertices with the same name
+    that can be reached after the same sequence of tokens.
+    """
+
+    __slots__ = ("name", "parent", "vertices", "tokens")
+
+    def __init__(self, name: str, parent: Optional["GraphNode"],
+                 vertices: List[Vertex]):
+        self.name = name
+        self.parent = parent
+        self.vertices = vertices
+        self.tokens = tuple(name.split())
+
+    def expression(self) -> str:
+        "Returns the expression to be matched against the input"
+        names = []
+        node = self
+        while node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return " ".join(reversed(names))
+
+
+def _closure(vertices: List[Vertex]) -> Dict[str, List[Vertex]]:
+    """
+    Follows the epsilon vertices from the given ones and groups the token
+    vertices reached by name, in order of discovery
+    """
+    groups: Dict[str, List[Vertex]] = {}
+    seen = set()
+    stack = list(reversed(vertices))
+    while stack:
+        v = stack.pop()
+        if id(v) in seen:
+            continue
+        seen.add(id(v))
+        if v.name is None:
+            stack.extend(reversed(v.next))
+        else:
+            groups.setdefault(v.name, []).append(v)
+    return groups
+
+
+class Grammar:
+    "The parsed grammar: one graph fragment per statement"
+
+    def __init__(self, statements: List[Fragment]):
+        self.statements = statements
+
+    def iter_paths(self) -> Iterator[List[str]]:
+        "Yields all the paths of the grammar, statement by statement"
+        for statement in self.statements:
+            yield from iter_statement_paths(statement)
+
+    def _root(self) -> GraphNode:
+        return GraphNode("", None, [])
+
+    def _children(self, node: GraphNode) -> List[GraphNode]:
+        if node.parent is None:
+            targets = [s[0] for s in self.statements]
+        else:
+            targets = [n for v in node.vertices for n in v.next]
+        return [
+            GraphNode(name, node, vertices)
+            for name, vertices in _closure(targets).items()
+        ]
+
+    def find_matching_nodes(self, input: str, subtrees: bool = True):
+        "Yields the (node, depth) pairs of the trie matching the input"
+        return matching.iter_matches(
+            self._root(), input, self._children, lambda n: n.tokens,
+            subtrees
+        )
+
+    def iter_suggestions(self, input: str) -> Iterator[str]:
+        """
+        Yields the suggestions one at a time. The graph is expanded only as
+        far as the caller reads.
+        """
+        for node, _ in self.find_matching_nodes(input):
+            yield node.expression()
+
+    def iter_predictions(self, input: str) -> Iterator[str]:
+        "Yields the predictions one at a time"
+        nodes = matching.shallowest_matches(
+            self._root(), input, self._children, lambda n: n.tokens
+        )
+        for node in nodes:
+            yield node.expression()
+
+    def get_suggestions(
+        self, input: str, limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        Returns a list of suggestions based on the input, at most limit
+        if given. Without a limit this enumerates everything below the
+        input, use with care on grammars with many paths.
+        """
+        return list(islice(self.iter_suggestions(input), limit))
+
+    def get_predictions(
+        self, input: str, limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        Returns a list of predictions based on the input, at most limit
+        if given. Only the graph vertices along the typed tokens are
+        visited.
+        """
+        return list(islice(self.iter_predictions(input), limit))
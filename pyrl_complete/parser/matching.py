@@ -0,0 +1,673 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Token level matching of the command line input against a completion trie.
+
+The input is split in whitespace separated tokens. A node matches the
+input when its expression starts with the input: each typed token must be
+equal to the corresponding token of the expression, apart from the last
+one which only needs to be a prefix, unless it is followed by a space.
+A placeholder in the expression accepts any token: either ? or a named
+placeholder such as ?host, whose values can come from a provider (see
+providers.Providers).
+
+The functions here are independent of how the trie is stored: they take a
+`children(node)` function returning the child nodes in order and a
+`segment(node)` function returning the tuple of tokens in the name of a
+node (e.g. ("-d", "?") for the node "-d ?"). An optional
+`lookup(node, token)` function returns the (position, child) pairs of the
+children whose first token can match a complete input token, in order
+(see index_children): with it a complete token costs a dict lookup
+instead of a pass over all the children.
+
+The walk is split in two steps:
+- advance: descends the trie along the complete tokens of the input and
+  returns the frontier, the list of (node, consumed, depth, rank) states
+  whose children are still undecided, in preorder (the rank of a node is
+  the tuple of the positions of its ancestors and itself among their
+  siblings);
+- collect: matches the children of the frontier against the rest of the
+  input and yields the matching nodes.
+Only the nodes along the typed tokens are visited, and the frontier can be
+reused by the caller when the input grows.
+"""
+
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+)
+
+PLACEHOLDER = "?"
+# below this many children, a lookup is not worth an index
+INDEX_MIN = 8
+
+Children = Callable[[Any], Iterable[Any]]
+Segment = Callable[[Any], Tuple[str, ...]]
+Lookup = Callable[[Any, str], Iterable[Tuple[int, Any]]]
+# (node, tokens consumed, depth, rank)
+State = Tuple[Any, int, int, Tuple[int, ...]]
+
+
+def tokenize(input: str) -> Optional[Tuple[List[str], bool]]:
+    """Splits the input in lowercase tokens.
+
+    Returns:
+        A (tokens, trailing) tuple, where trailing tells if the input ends
+        with whitespace, i.e. if the last token is complete. None if the
+        input starts with whitespace, since then nothing can match.
+    """
+    if input[:1].isspace():
+        return None
+    return input.lower().split(), input[-1:].isspace()
+
+
+def complete_tokens(tokens: List[str], trailing: bool) -> int:
+    "Number of tokens that are complete, i.e. not partially typed"
+    if trailing or len(tokens) == 0:
+        return len(tokens)
+    return len(tokens) - 1
+
+
+def is_placeholder(token: str) -> bool:
+    "Checks if a token of the expression is a placeholder, e.g. ? or ?host"
+    return token[0] == PLACEHOLDER
+
+
+def placeholder_name(token: str) -> str:
+    "The name of a placeholder, empty for an anonymous one"
+    return token[1:]
+
+
+def token_matches(expected: str, token: str) -> bool:
+    "Checks a complete input token against a token of the expression"
+    return expected == token or expected[0] == PLACEHOLDER
+
+
+def prefix_matches(expected: str, token: str) -> bool:
+    "Checks a partially typed input token against a token of the expression"
+    return expected.startswith(token) or expected[0] == PLACEHOLDER
+
+
+def matches_expression(
+    expression: Tuple[str, ...], tokens: List[str], trailing: bool
+) -> bool:
+    """
+    Checks if the input matches the node with the given expression tokens,
+    in one pass over the input tokens.
+    """
+    n = len(tokens)
+    if n == 0:
+        return True
+    if n > len(expression):
+        return False
+    for k in range(n - 1):
+        if not token_matches(expression[k], tokens[k]):
+            return False
+    expected = expression[n - 1]
+    if not trailing:
+        return prefix_matches(expected, tokens[-1])
+    # a complete last token must be followed by more of the expression,
+    # unless it fills a placeholder
+    return token_matches(expected, tokens[-1]) and (
+        n < len(expression) or is_placeholder(expected)
+    )
+
+
+def reaches(expression: List[str], tokens: List[str], trailing: bool) -> bool:
+    """
+    Checks if the input could match the node with the given expression
+    tokens, or any node below it.
+    """
+    last = len(tokens) - 1
+    for k, expected in enumerate(expression[:len(tokens)]):
+        if k == last and not trailing:
+            return prefix_matches(expected, tokens[k])
+        if not token_matches(expected, tokens[k]):
+            return False
+    return True
+
+
+def index_children(
+    children: Iterable[Any], segment: Segment
+) -> Dict[str, List[Tuple[int, Any]]]:
+    """Indexes children by their first token, for a lookup function. The
+    children starting with a placeholder are all under PLACEHOLDER.
+    Returns a map from first token to (position, child) pairs, in order.
+    """
+    index: Dict[str, List[Tuple[int, Any]]] = {}
+    for position, child in enumerate(children):
+        first = segment(child)[0]
+        key = PLACEHOLDER if is_placeholder(first) else first
+        index.setdefault(key, []).append((position, child))
+    return index
+
+
+def indexed(index: Dict[str, List[Tuple[int, Any]]],
+            token: str) -> List[Tuple[int, Any]]:
+    """The (position, child) pairs of an index of children whose first
+    token can match a complete input token, in order"""
+    placeholders = index.get(PLACEHOLDER, [])
+    if is_placeholder(token):
+        return placeholders
+    exact = index.get(token)
+    if exact is None:
+        return placeholders
+    if not placeholders:
+        return exact
+    return sorted(exact + placeholders, key=_first)
+
+
+def _first(pair: Tuple[int, Any]) -> int:
+    return pair[0]
+
+
+def _rank(state: State) -> Tuple[int, ...]:
+    return state[3]
+
+
+def _candidates(node, tokens: List[str], consumed: int, stop: int,
+                children: Children,
+                lookup: Optional[Lookup]) -> Iterable[Tuple[int, Any]]:
+    """
+    The (position, child) pairs of the children of a node that can match
+    the input from the token consumed, all of them without a lookup
+    """
+    if lookup is not None and consumed < stop:
+        return lookup(node, tokens[consumed])
+    return enumerate(children(node))
+
+
+def advance(
+    frontier: Iterable[State],
+    tokens: List[str],
+    decided: int,
+    stop: int,
+    children: Children,
+    segment: Segment,
+    lookup: Optional[Lookup] = None,
+) -> List[State]:
+    """Advances a frontier to cover the first `stop` tokens of the input.
+
+    Args:
+        frontier: the states to start from, in preorder.
+        tokens: the input tokens.
+        decided: the number of tokens the frontier already covers. Children
+            ending within these tokens have already been followed.
+        stop: the number of complete tokens to cover.
+        children: returns the children of a node.
+        segment: returns the tokens of a node.
+        lookup: returns the children that can match a complete token.
+
+    Returns:
+        The new frontier, in preorder.
+    """
+    out: List[Optional[State]] = []
+    for node, consumed, depth, rank in frontier:
+        _advance(node, consumed, depth, rank, decided, tokens, stop,
+                 children, segment, lookup, out)
+    new = [s for s in out if s is not None]
+    # the children of a state only decided now, e.g. a multi-token option,
+    # go back among the states of their siblings decided before
+    new.sort(key=_rank)
+    return new
+
+
+def _advance(node, consumed, depth, rank, decided, tokens, stop,
+             children, segment, lookup, out):
+    index = len(out)
+    out.append((node, consumed, depth, rank))
+    pending = consumed == stop
+    candidates = _candidates(node, tokens, consumed, stop, children, lookup)
+    for position, child in candidates:
+        seg = segment(child)
+        end = consumed + len(seg)
+        if end <= decided:
+            continue
+        if end > stop:
+            pending = True
+            continue
+        if all(token_matches(e, t) for e, t in zip(seg, tokens[consumed:])):
+            _advance(child, end, depth + 1, rank + (position,), end, tokens,
+                     stop, children, segment, lookup, out)
+    if not pending:
+        # nothing left to decide below this node
+        out[index] = None
+
+
+def _segment_matches(seg, tokens, consumed, trailing) -> bool:
+    "Matches a segment that reaches past the complete tokens of the input"
+    last = len(tokens) - 1
+    for k in range(consumed, len(tokens)):
+        expected = seg[k - consumed]
+        if k == last and not trailing:
+            if not prefix_matches(expected, tokens[k]):
+                return False
+        elif not token_matches(expected, tokens[k]):
+            return False
+    return True
+
+
+def subtree(node, depth: int, children: Children) -> Iterator[Tuple[Any, int]]:
+    "Yields (node, depth) for node and all its descendants, in preorder"
+    yield node, depth
+    stack = [(iter(children(node)), depth + 1)]
+    while stack:
+        it, d = stack[-1]
+        child = next(it, None)
+        if child is None:
+            stack.pop()
+            continue
+        yield child, d
+        stack.append((iter(children(child)), d + 1))
+
+
+def _matches_itself(node, consumed: int, tokens: List[str],
+                    trailing: bool, segment: Segment) -> bool:
+    """
+    A node the input ends right after matches only if it is the root or if
+    it ends with a filled placeholder
+    """
+    n = len(tokens)
+    return consumed == n and (
+        n == 0 or (trailing and is_placeholder(segment(node)[-1]))
+    )
+
+
+def _matching_children(node, consumed: int, tokens: List[str],
+                       trailing: bool, stop: int, children: Children,
+                       segment: Segment,
+                       lookup: Optional[Lookup] = None) -> Iterator[Any]:
+    "Yields the children of a frontier node matching the rest of the input"
+    if consumed == len(tokens):
+        yield from children(node)
+        return
+    candidates = _candidates(node, tokens, consumed, stop, children, lookup)
+    for _, child in candidates:
+        seg = segment(child)
+        if consumed + len(seg) <= stop:
+            continue  # followed by advance already
+        if _segment_matches(seg, tokens, consumed, trailing):
+            yield child
+
+
+def collect(
+    frontier: Iterable[State],
+    tokens: List[str],
+    trailing: bool,
+    children: Children,
+    segment: Segment,
+    subtrees: bool = True,
+    lookup: Optional[Lookup] = None,
+) -> Iterator[Tuple[Any, int]]:
+    """Yields the (node, depth) pairs matching the input below a frontier.
+
+    When subtrees is False only the topmost matching node of each branch is
+    returned: everything below it matches as well, one or more levels down.
+    """
+    stop = complete_tokens(tokens, trailing)
+    for node, consumed, depth, _ in frontier:
+        if _matches_itself(node, consumed, tokens, trailing, segment):
+            yield node, depth
+        for child in _matching_children(node, consumed, tokens, trailing,
+                                        stop, children, segment, lookup):
+            if subtrees:
+                yield from subtree(child, depth + 1, children)
+            else:
+                yield child, depth + 1
+
+
+def collect_shallowest(
+    frontier: Iterable[State],
+    tokens: List[str],
+    trailing: bool,
+    children: Children,
+    segment: Segment,
+    lookup: Optional[Lookup] = None,
+) -> List[Any]:
+    """Returns the nodes matching the input at the minimum depth, excluding
+    the root, in the order of collect.
+
+    The frontier is searched level by level: a state at depth d matches
+    itself at depth d or its children at depth d + 1, so the search stops
+    at the first level with matches and the deeper states are never
+    expanded.
+    """
+    frontier = list(frontier)
+    stop = complete_tokens(tokens, trailing)
+    levels = sorted({d + k for _, _, d, _ in frontier for k in (0, 1)})
+    for level in levels:
+        nodes = []
+        for node, consumed, depth, _ in frontier:
+            if depth == level:
+                if level > 0 and _matches_itself(
+                    node, consumed, tokens, trailing, segment
+                ):
+                    nodes.append(node)
+            elif depth == level - 1:
+                nodes.extend(_matching_children(
+                    node, consumed, tokens, trailing, stop, children, segment,
+                    lookup
+                ))
+        if nodes:
+            return nodes
+    return []
+
+
+def _start(root, tokens: List[str], trailing: bool, children: Children,
+           segment: Segment, prefix: Tuple[str, ...], depth: int,
+           lookup: Optional[Lookup]):
+    """
+    Returns the frontier of the complete tokens of the input below root,
+    or None if root itself reaches past them and matches the input
+    """
+    stop = complete_tokens(tokens, trailing)
+    consumed = len(prefix)
+    if consumed > stop:
+        return None
+    if not all(token_matches(e, t) for e, t in zip(prefix, tokens)):
+        return []
+    return advance([(root, consumed, depth, ())], tokens, consumed, stop,
+                   children, segment, lookup)
+
+
+def iter_matches(
+    root,
+    input: str,
+    children: Children,
+    segment: Segment,
+    subtrees: bool = True,
+    prefix: Tuple[str, ...] = (),
+    depth: int = 0,
+    lookup: Optional[Lookup] = None,
+) -> Iterator[Tuple[Any, int]]:
+    """Yields all the (node, depth) pairs matching input, starting at root.
+
+    When root is not the root of the trie, prefix holds the tokens of its
+    expression and depth its depth.
+    """
+    parsed = tokenize(input)
+    if parsed is None:
+        return
+    tokens, trailing = parsed
+    frontier = _start(root, tokens, trailing, children, segment, prefix,
+                      depth, lookup)
+    if frontier is None:
+        # root itself reaches past the complete tokens of the input
+        if _segment_matches(prefix, tokens, 0, trailing):
+            if subtrees:
+                yield from subtree(root, depth, children)
+            else:
+                yield root, depth
+        return
+    yield from collect(frontier, tokens, trailing, children, segment,
+                       subtrees, lookup)
+
+
+def shallowest_matches(
+    root,
+    input: str,
+    children: Children,
+    segment: Segment,
+    prefix: Tuple[str, ...] = (),
+    depth: int = 0,
+    lookup: Optional[Lookup] = None,
+) -> List[Any]:
+    """Returns the nodes matching input at the minimum depth, the
+    predictions, as shallowest(iter_matches(..., subtrees=False)) but
+    without visiting the levels below them (see collect_shallowest).
+    """
+    parsed = tokenize(input)
+    if parsed is None:
+        return []
+    tokens, trailing = parsed
+    frontier = _start(root, tokens, trailing, children, segment, prefix,
+                      depth, lookup)
+    if frontier is None:
+        if depth > 0 and _segment_matches(prefix, tokens, 0, trailing):
+            return [root]
+        return []
+    return collect_shallowest(frontier, tokens, trailing, children, segment,
+                              lookup)
+
+
+def match_many(
+    root,
+    inputs: List[str],
+    children: Children,
+    segment: Segment,
+    subtrees: bool = True,
+    lookup: Optional[Lookup] = None,
+) -> List[List[Tuple[Any, int]]]:
+    """Matches many inputs at once, returning the (node, depth) pairs
+    matching each input, in input order.
+
+    The inputs are sorted by their complete tokens, so that inputs sharing
+    their first tokens are next to each other: the frontier of the tokens
+    an input shares with the next one is computed once, kept, and advanced
+    over the remaining tokens of each. Equal inputs are matched once.
+    """
+    parsed = [tokenize(i) for i in inputs]
+    results: List[List[Tuple[Any, int]]] = [[] for _ in inputs]
+    # (complete tokens, tokens, trailing) of each input, its sort key
+    keys = {}
+    for i, p in enumerate(parsed):
+        if p is not None:
+            tokens, trailing = p
+            stop = complete_tokens(tokens, trailing)
+            keys[i] = (tokens[:stop], tokens, trailing)
+
+    order = sorted(keys, key=keys.__getitem__)
+    # (tokens covered, frontier) of the prefixes of the current input,
+    # shortest first
+    stack: List[Tuple[int, List[State]]] = [(0, [(root, 0, 0, ())])]
+    shared = 0  # complete tokens shared with the previous input
+    for n, i in enumerate(order):
+        complete, tokens, trailing = keys[i]
+        following = 0  # complete tokens shared with the next input
+        if n + 1 < len(order):
+            following = _common_prefix(complete, keys[order[n + 1]][0])
+        if n > 0 and parsed[order[n - 1]] == parsed[i]:
+            results[i] = list(results[order[n - 1]])
+            shared = following
+            continue
+        while stack[-1][0] > shared:
+            stack.pop()
+        # the tokens shared with the next input, then the rest
+        for stop in (following, len(complete)):
+            known, frontier = stack[-1]
+            if stop > known:
+                stack.append((stop, advance(frontier, tokens, known, stop,
+                                            children, segment, lookup)))
+        results[i] = list(collect(stack[-1][1], tokens, trailing, children,
+                                  segment, subtrees, lookup))
+        shared = following
+    return results
+
+
+def _common_prefix(a: List[str], b: List[str]) -> int:
+    "Length of the common prefix of two lists of tokens"
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def edit_distance(
+    expected: str, token: str, budget: int, prefix: bool = False
+) -> int:
+    """Edit distance between a token of the expression and an input token.
+
+    Insertions, deletions, substitutions and transpositions of adjacent
+    characters cost one edit each, a placeholder accepts any token. The
+    distance is computed one row per input character, and the computation
+    stops as soon as all the row exceeds budget: the value returned is then
+    only known to be more than budget. With prefix, the distance is to the
+    closest prefix of expected, for a partially typed token.
+    """
+    if expected == token or is_placeholder(expected):
+        return 0
+    if prefix and expected.startswith(token):
+        return 0
+    before = None
+    previous = list(range(len(expected) + 1))
+    for i, c in enumerate(token, 1):
+        current = [i]
+        for j, e in enumerate(expected, 1):
+            d = min(previous[j] + 1, current[j - 1] + 1,
+                    previous[j - 1] + (c != e))
+            if (before is not None and j > 1 and c == expected[j - 2]
+                    and token[i - 2] == e):
+                d = min(d, before[j - 2] + 1)
+            current.append(d)
+        if min(current) > budget:
+            return min(current)
+        before, previous = previous, current
+    return min(previous) if prefix else previous[-1]
+
+
+def _segment_cost(seg, tokens, consumed, trailing, budget) -> int:
+    "Edits to match a segment against the input tokens from consumed on"
+    total = 0
+    last = len(tokens) - 1
+    for j, expected in enumerate(seg):
+        k = consumed + j
+        if k > last:
+            break
+        partial = k == last and not trailing
+        total += edit_distance(expected, tokens[k], budget - total, partial)
+        if total > budget:
+            break
+    return total
+
+
+def fuzzy_matches(
+    root,
+    input: str,
+    children: Children,
+    segment: Segment,
+    max_edits: int,
+    subtrees: bool = True,
+    prefix: Tuple[str, ...] = (),
+    depth: int = 0,
+) -> Iterator[Tuple[Any, int, int]]:
+    """Yields the (node, depth, edits) triples matching input with at most
+    max_edits edits, in the order of iter_matches.
+
+    The input tokens are compared one to one with the tokens of the
+    expressions, as in iter_matches, but each token may be misspelled (see
+    edit_distance). The edits add up along a path, and a branch is left as
+    soon as they exceed max_edits.
+    """
+    parsed = tokenize(input)
+    if parsed is None:
+        return
+    tokens, trailing = parsed
+    stop = complete_tokens(tokens, trailing)
+    n = len(tokens)
+
+    def found(node, depth, edits):
+        if subtrees:
+            for match, d in subtree(node, depth, children):
+                yield match, d, edits
+        else:
+            yield node, depth, edits
+
+    def walk(node, consumed, depth, edits):
+        if consumed == n:
+            if n == 0 or (trailing and is_placeholder(segment(node)[-1])):
+                yield node, depth, edits
+            for child in children(node):
+                yield from found(child, depth + 1, edits)
+            return
+        for child in children(node):
+            seg = segment(child)
+            cost = edits + _segment_cost(
+                seg, tokens, consumed, trailing, max_edits - edits
+            )
+            if cost > max_edits:
+                continue
+            end = consumed + len(seg)
+            if end > stop:
+                yield from found(child, depth + 1, cost)
+            else:
+                yield from walk(child, end, depth + 1, cost)
+
+    edits = _segment_cost(prefix, tokens, 0, trailing, max_edits)
+    if edits > max_edits:
+        return
+    if len(prefix) > stop:
+        # root itself reaches past the complete tokens of the input
+        yield from found(root, depth, edits)
+    else:
+        yield from walk(root, len(prefix), depth, edits)
+
+
+def ranked(matches: Iterable[Tuple[Any, int, int]]) -> List[Any]:
+    """
+    Orders the predictions of fuzzy_matches by edits: for each number of
+    edits, the matching nodes at the minimum depth (see shallowest)
+    """
+    matches = list(matches)
+    nodes = []
+    for edits in sorted({e for _, _, e in matches}):
+        nodes += shallowest((n, d) for n, d, e in matches if e == edits)
+    return nodes
+
+
+def split_at_cursor(line: str, begidx: int,
+                    endidx: int) -> Tuple[str, int, int]:
+    """Splits a line for the completion of line[begidx:endidx], the text
+    readline asks to complete.
+
+    Returns:
+        The input to match, the line up to endidx; the index of the token
+        under the cursor; and the offset of begidx in that token, which is
+        not 0 when readline splits the words on more than whitespace.
+    """
+    start = begidx
+    while start > 0 and not line[start - 1].isspace():
+        start -= 1
+    return line[:endidx], len(line[:start].split()), begidx - start
+
+
+def words_at(
+    expressions: Iterable[Tuple[str, ...]],
+    index: int,
+    typed: str,
+    values: Callable[[str], List[str]],
+) -> List[str]:
+    """Returns the distinct tokens at index of the expressions, in order:
+    the words that can be typed at that position. A placeholder stands for
+    values(name), the ones starting with the typed word.
+    """
+    words: Dict[str, None] = {}  # an ordered set
+    for expression in expressions:
+        if len(expression) <= index:
+            continue
+        token = expression[index]
+        if is_placeholder(token):
+            candidates = [
+                v for v in values(placeholder_name(token))
+                if v.startswith(typed)
+            ]
+        else:
+            candidates = [token]
+        for word in candidates:
+            words.setdefault(word)
+    return list(words)
+
+
+def shallowest(matches: Iterable[Tuple[Any, int]]) -> List[Any]:
+    "Keeps the matching nodes at the minimum depth, excluding the root"
+    best = []
+    min_depth = None
+    for node, depth in matches:
+        if depth == 0:
+            continue
+        if min_depth is None or depth < min_depth:
+            min_depth = depth
+            best = [node]
+        elif depth == min_depth:
+            best.append(node)
+    return best
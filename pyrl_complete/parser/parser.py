@@ -1,16 +1,134 @@
 # Copyright (C) 2025 codimoc, codimoc@prismoid.uk
 
+import copy
+import re
+import threading
+from typing import Dict, Iterator, List, Sequence, Tuple
 from . import rules
+from .grammar import Fragment, Grammar, PathsView, iter_statement_paths
 from ply import lex, yacc
 
+# the LALR tables are precomputed and shipped with the package in this
+# module. If the grammar in rules.py changes, regenerate them with
+# write_tables(), otherwise they are rebuilt in memory once per process.
+TABMODULE = "pyrl_complete.parser.parsetab"
+
+_build_lock = threading.Lock()
+_lexer = None
+_yacc_parser = None
+
+
+def _get_engine():
+    """
+    Returns the (lexer, parser) pair, building it on first use.
+    Nothing is written to disk: the tables are read from TABMODULE.
+    """
+    global _lexer, _yacc_parser
+    if _yacc_parser is None:
+        with _build_lock:
+            if _yacc_parser is None:
+                _lexer = lex.lex(module=rules)
+                _yacc_parser = yacc.yacc(
+                    module=rules,
+                    tabmodule=TABMODULE,
+                    write_tables=False,
+                    debug=False,
+                    errorlog=yacc.NullLogger(),
+                )
+    return _lexer, _yacc_parser
+
+
+def write_tables(outputdir: str):
+    "Regenerates parsetab.py into outputdir (the package directory)"
+    yacc.yacc(
+        module=rules,
+        tabmodule="parsetab",
+        outputdir=outputdir,
+        write_tables=True,
+        debug=False,
+    )
+
 
 class Parser:
-    paths: rules.Paths = []
+    "Parses the rules grammar. Each instance holds its own results"
+
+    def __init__(self):
+        self.grammar = Grammar([])
+        self.paths: Sequence[List[str]] = PathsView(self.grammar)
+        # the text of each statement in self.grammar, see update
+        self.texts: List[str] = []
+
+    def _parse(self, data: str) -> Tuple[List[Fragment], List[str]]:
+        "Parses data, returns its statements and their texts"
+        lexer, parser = _get_engine()
+        # fresh copies of the lexer and the parser share the tables but not
+        # the parse state, so concurrent calls never see each other's paths
+        parser = copy.copy(parser)
+        parser.statements = []
+        parser.texts = []
+        parser.statement_start = 0
+        parser.parse(data, lexer=lexer.clone())
+        return parser.statements, parser.texts
+
+    def _set_grammar(self, statements: List[Fragment], texts: List[str]):
+        self.grammar = Grammar(statements)
+        self.paths = PathsView(self.grammar)
+        self.texts = texts
+        rules.paths = self.paths
 
     def parse(self, data: str):
-        "parse method to parse the grammar written in data"
-        rules.paths = []
-        lex.lex(module=rules)
-        parser = yacc.yacc(module=rules)
-        parser.parse(data)
-        self.paths = rules.paths
+        """
+        parse method to parse the grammar written in data.
+        The result is the grammar graph in self.grammar; self.paths lists
+        its paths, enumerated on first access.
+        """
+        self._set_grammar(*self._parse(data))
+
+    def update(self, data: str) -> Tuple[rules.Paths, rules.Paths]:
+        """
+        Incremental version of parse, for a new version of the rules.
+        The rules are split in statements (on ';' and newlines) and only
+        the statements that are not in the current grammar are parsed.
+
+        Returns:
+            A tuple (added, removed) with the paths of the statements added
+            to and removed from the grammar, to patch a Tree with.
+        """
+        old: Dict[str, List[Fragment]] = {}
+        for text, statement in zip(self.texts, self.grammar.statements):
+            old.setdefault(text, []).append(statement)
+        statements: List[Fragment] = []
+        texts: List[str] = []
+        added: rules.Paths = []
+        for text in _split_statements(data):
+            if old.get(text):
+                # unchanged statement: reuse its graph
+                statements.append(old[text].pop(0))
+                texts.append(text)
+                continue
+            new_statements, new_texts = self._parse(text + "\n")
+            for statement in new_statements:
+                added.extend(iter_statement_paths(statement))
+            statements.extend(new_statements)
+            texts.extend(new_texts)
+        removed: rules.Paths = [
+            path
+            for remaining in old.values()
+            for statement in remaining
+            for path in iter_statement_paths(statement)
+        ]
+        self._set_grammar(statements, texts)
+        return added, removed
+
+    def iter_paths(self) -> Iterator[List[str]]:
+        """
+        Yields the paths of the last parsed grammar one at a time, straight
+        from the grammar graph, without building the list of paths
+        """
+        return self.grammar.iter_paths()
+
+
+def _split_statements(data: str) -> List[str]:
+    "Splits the rules in the texts of their statements, as in rules.p_line"
+    texts = [rules.statement_key(t) for t in re.split(r"[;\n]", data)]
+    return [t for t in texts if t]
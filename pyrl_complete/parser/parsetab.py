@@ -0,0 +1,54 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'EOL EOS LBR LSB OPTION OR RBR RSB WORDall : line\n    | all lineline : path EOL\n    | path EOS\n    | path EOS EOL\n    path : wrdopt\n    | alternatives\n    | collection\n    | path wrdopt\n    | path collection\n    | path alternatives\n    group : LBR alternatives RBR\n    | LBR path RBR\n    ogroup : LSB alternatives RSB\n    | LSB path RSB\n    alternatives : alternatives OR wrdopt\n    | alternatives OR collection\n    | wrdopt OR collection\n    | collection OR wrdopt\n    | wrdopt OR wrdopt\n    wrdopt : WORD\n    | OPTION\n    collection : group\n    | ogroup\n    '
+    
+_lr_action_items = {'WORD':([0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,],[7,7,-1,7,-6,-7,-8,-21,-22,-23,-24,7,7,-2,-3,-4,-9,-10,-11,7,7,7,-7,7,-6,-8,-7,7,-5,-20,-18,-16,-17,-19,-12,-13,-14,-15,]),'OPTION':([0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,],[8,8,-1,8,-6,-7,-8,-21,-22,-23,-24,8,8,-2,-3,-4,-9,-10,-11,8,8,8,-7,8,-6,-8,-7,8,-5,-20,-18,-16,-17,-19,-12,-13,-14,-15,]),'LBR':([0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,],[11,11,-1,11,-6,-7,-8,-21,-22,-23,-24,11,11,-2,-3,-4,-9,-10,-11,11,11,-7,11,-6,-8,-7,11,-5,-20,-18,-16,-17,-19,-12,-13,-14,-15,]),'LSB':([0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,],[12,12,-1,12,-6,-7,-8,-21,-22,-23,-24,12,12,-2,-3,-4,-9,-10,-11,12,12,-7,12,-6,-8,-7,12,-5,-20,-18,-16,-17,-19,-12,-13,-14,-15,]),'$end':([1,2,13,14,15,28,],[0,-1,-2,-3,-4,-5,]),'EOL':([3,4,5,6,7,8,9,10,15,16,17,18,29,30,31,32,33,34,35,36,37,],[14,-6,-7,-8,-21,-22,-23,-24,28,-9,-10,-11,-20,-18,-16,-17,-19,-12,-13,-14,-15,]),'EOS':([3,4,5,6,7,8,9,10,16,17,18,29,30,31,32,33,34,35,36,37,],[15,-6,-7,-8,-21,-22,-23,-24,-9,-10,-11,-20,-18,-16,-17,-19,-12,-13,-14,-15,]),'OR':([4,5,6,7,8,9,10,16,17,18,22,24,25,26,29,30,31,32,33,34,35,36,37,],[19,20,21,-21,-22,-23,-24,19,21,20,20,19,21,20,-20,-18,-16,-17,-19,-12,-13,-14,-15,]),'RBR':([7,8,9,10,16,17,18,22,23,24,25,29,30,31,32,33,34,35,36,37,],[-21,-22,-23,-24,-9,-10,-11,34,35,-6,-8,-20,-18,-16,-17,-19,-12,-13,-14,-15,]),'RSB':([7,8,9,10,16,17,18,24,25,26,27,29,30,31,32,33,34,35,36,37,],[-21,-22,-23,-24,-9,-10,-11,-6,-8,36,37,-20,-18,-16,-17,-19,-12,-13,-14,-15,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'all':([0,],[1,]),'line':([0,1,],[2,13,]),'path':([0,1,11,12,],[3,3,23,27,]),'wrdopt':([0,1,3,11,12,19,20,21,23,27,],[4,4,16,24,24,29,31,33,16,16,]),'alternatives':([0,1,3,11,12,23,27,],[5,5,18,22,26,18,18,]),'collection':([0,1,3,11,12,19,20,23,27,],[6,6,17,25,25,30,32,17,17,]),'group':([0,1,3,11,12,19,20,23,27,],[9,9,9,9,9,9,9,9,9,]),'ogroup':([0,1,3,11,12,19,20,23,27,],[10,10,10,10,10,10,10,10,10,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> all","S'",1,None,None,None),
+  ('all -> line','all',1,'p_all','rules.py',99),
+  ('all -> all line','all',2,'p_all','rules.py',100),
+  ('line -> path EOL','line',2,'p_line','rules.py',105),
+  ('line -> path EOS','line',2,'p_line','rules.py',106),
+  ('line -> path EOS EOL','line',3,'p_line','rules.py',107),
+  ('path -> wrdopt','path',1,'p_path','rules.py',116),
+  ('path -> alternatives','path',1,'p_path','rules.py',117),
+  ('path -> collection','path',1,'p_path','rules.py',118),
+  ('path -> path wrdopt','path',2,'p_path','rules.py',119),
+  ('path -> path collection','path',2,'p_path','rules.py',120),
+  ('path -> path alternatives','path',2,'p_path','rules.py',121),
+  ('group -> LBR alternatives RBR','group',3,'p_group','rules.py',133),
+  ('group -> LBR path RBR','group',3,'p_group','rules.py',134),
+  ('ogroup -> LSB alternatives RSB','ogroup',3,'p_optional_group','rules.py',140),
+  ('ogroup -> LSB path RSB','ogroup',3,'p_optional_group','rules.py',141),
+  ('alternatives -> alternatives OR wrdopt','alternatives',3,'p_alternatives','rules.py',149),
+  ('alternatives -> alternatives OR collection','alternatives',3,'p_alternatives','rules.py',150),
+  ('alternatives -> wrdopt OR collection','alternatives',3,'p_alternatives','rules.py',151),
+  ('alternatives -> collection OR wrdopt','alternatives',3,'p_alternatives','rules.py',152),
+  ('alternatives -> wrdopt OR wrdopt','alternatives',3,'p_alternatives','rules.py',153),
+  ('wrdopt -> WORD','wrdopt',1,'p_word_or_option','rules.py',159),
+  ('wrdopt -> OPTION','wrdopt',1,'p_word_or_option','rules.py',160),
+  ('collection -> group','collection',1,'p_collection','rules.py',166),
+  ('collection -> ogroup','collection',1,'p_collection','rules.py',167),
+]
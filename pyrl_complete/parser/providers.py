@@ -0,0 +1,244 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Values of the named placeholders, supplied by providers.
+
+A rule like `ssh ?host [-p ?port]` has two named placeholders. A provider
+is a callback registered under the name of a placeholder, returning or
+yielding its values (e.g. the known hosts). The values are kept in a cache
+per provider for ttl seconds.
+
+A keystroke never waits on a slow provider: the values are fetched by a
+pool of daemon threads, which the exit of the process does not wait for
+either, and a query waits at most `timeout` seconds for them, in
+all, however many providers it needs. In the meantime it gets the values
+of the previous fetch, even if expired, or the values yielded so far by
+the running one.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from . import matching
+
+Provider = Callable[[], Iterable[str]]
+
+
+class _Entry:
+    "The cached values of a provider"
+
+    __slots__ = ("values", "fetched", "partial", "future")
+
+    def __init__(self):
+        self.values: Optional[List[str]] = None  # of the last fetch
+        self.fetched = 0.0  # when the last fetch ended
+        self.partial: List[str] = []  # yielded so far by the running fetch
+        self.future: Optional[Future] = None  # the running fetch
+
+
+class _DaemonPool:
+    """
+    A pool of daemon threads running functions, as a ThreadPoolExecutor
+    does, but whose threads the exit of the process does not join: a hung
+    provider cannot keep a CLI from exiting.
+    """
+
+    def __init__(self, max_workers: int, name: str):
+        self.max_workers = max_workers
+        self.name = name
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+
+    def submit(self, function: Callable, *args) -> Future:
+        "Runs function(*args) on a thread of the pool"
+        if self._closed:
+            raise RuntimeError("cannot submit after shutdown")
+        future: Future = Future()
+        self._queue.put((future, function, args))
+        if len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._work, daemon=True,
+                name=f"{self.name}_{len(self._threads)}",
+            )
+            self._threads.append(thread)
+            thread.start()
+        return future
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            future, function, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = function(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait: bool = True):
+        "Stops the threads once the functions submitted have run"
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class Providers:
+    """
+    The providers of the named placeholders of a tree, with their TTL
+    caches. Expired or missing values are fetched in the background.
+    """
+
+    def __init__(self, ttl: float = 60.0, timeout: float = 0.02,
+                 max_workers: int = 4,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.clock = clock
+        self._providers: Dict[str, Provider] = {}
+        self._ttls: Dict[str, float] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._executor = _DaemonPool(max_workers, "pyrl-provider")
+
+    def register(self, name: str, provider: Provider,
+                 ttl: Optional[float] = None):
+        """
+        Registers the provider of the placeholder ?name, replacing any
+        previous one, with its own ttl if given
+        """
+        with self._lock:
+            self._providers[name] = provider
+            self._ttls[name] = self.ttl if ttl is None else ttl
+            self._entries[name] = _Entry()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._providers
+
+    def _fetch(self, provider: Provider, entry: _Entry):
+        try:
+            for value in provider():
+                with self._lock:
+                    entry.partial.append(value)
+            with self._lock:
+                entry.values = entry.partial
+        finally:
+            # a failed fetch keeps the old values until the next ttl
+            with self._lock:
+                entry.fetched = self.clock()
+                entry.partial = []
+                entry.future = None
+
+    def _start(self, name: str) -> Tuple[_Entry, Optional[Future]]:
+        "Starts a fetch if the values are missing or expired"
+        with self._lock:
+            provider = self._providers[name]
+            entry = self._entries[name]
+            expired = (
+                entry.values is None
+                or self.clock() - entry.fetched > self._ttls[name]
+            )
+            if expired and entry.future is None:
+                entry.future = self._executor.submit(
+                    self._fetch, provider, entry
+                )
+            return entry, entry.future
+
+    def deadline(self) -> float:
+        "The time.monotonic() time a query starting now waits until"
+        return time.monotonic() + self.timeout
+
+    def values(self, name: str,
+               deadline: Optional[float] = None) -> List[str]:
+        """
+        Returns the values of the placeholder ?name, starting a fetch in
+        the background if they are missing or expired, and waiting for it
+        until deadline, at most timeout seconds from now by default.
+        Raises KeyError for an unknown provider.
+        """
+        entry, future = self._start(name)
+        if future is not None:
+            if deadline is None:
+                deadline = self.deadline()
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                wait([future], remaining)
+        with self._lock:
+            if entry.values is not None:
+                return list(entry.values)
+            return list(entry.partial)
+
+    def fill(self, predictions: Iterable[str], input: str) -> List[str]:
+        """
+        Fills the placeholders of many predictions, as expand does, waiting
+        at most timeout seconds in all: the fetches of all the placeholders
+        being typed are started first, then waited for together.
+        """
+        predictions = list(predictions)
+        current = _current(input)
+        if current is not None:
+            for prediction in predictions:
+                tokens = prediction.split()[current:current + 1]
+                if tokens and matching.is_placeholder(tokens[0]):
+                    name = matching.placeholder_name(tokens[0])
+                    if name in self:
+                        self._start(name)
+        deadline = self.deadline()
+        return [p for prediction in predictions
+                for p in self.expand(prediction, input, deadline)]
+
+    def expand(self, prediction: str, input: str,
+               deadline: Optional[float] = None) -> List[str]:
+        """
+        Fills the placeholders of a prediction from the input. The
+        placeholders already typed take the words of the input; the one
+        being typed, or the next one after a space, is replaced by each
+        value of its provider starting with what was typed so far, waiting
+        for them as values does. Returns the prediction as is if there is
+        nothing to fill.
+        """
+        current = _current(input)
+        if current is None:
+            return [prediction]
+        words = input.split()
+        tokens = prediction.split()
+        for k, token in enumerate(tokens[:current + 1]):
+            if not matching.is_placeholder(token):
+                continue
+            name = matching.placeholder_name(token)
+            typed = words[k] if k < len(words) else ""
+            if k == current and name in self:
+                values = [v for v in self.values(name, deadline)
+                          if v.startswith(typed)]
+                if values:
+                    return [
+                        " ".join(tokens[:k] + [v] + tokens[k + 1:])
+                        for v in values
+                    ]
+            if typed:
+                tokens[k] = typed
+        return [" ".join(tokens)]
+
+    def close(self):
+        "Stops the fetching threads, without waiting for the running fetches"
+        self._executor.shutdown(wait=False)
+
+
+def _current(input: str) -> Optional[int]:
+    """
+    Index of the word being typed, or of the next one after a space, None
+    if the input matches nothing
+    """
+    if input[:1].isspace():
+        return None
+    words = input.split()
+    return len(words) if input[-1:].isspace() else len(words) - 1
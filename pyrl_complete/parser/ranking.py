@@ -0,0 +1,107 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Ranking of the completions by how often, and how recently, they are used.
+
+Every accepted completion adds one to a usage counter, which then halves
+every half_life seconds. Instead of decaying all the counters as time
+goes by, each use is weighted by 2 ** ((now - epoch) / half_life): the
+stored values all miss the same factor, so they can be compared as they
+are, and a counter is a single float.
+"""
+
+import heapq
+import json
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+DAY = 24 * 3600
+# rebase the weights before they grow too large for a float
+_MAX_HALF_LIVES = 64
+# counters decayed below this are dropped when rebasing
+_MIN_SCORE = 1e-3
+
+
+class UsageRanking:
+    """
+    Usage counters of the expressions of a tree, fed by accept, or by
+    Tree.accept for a command line with the values of its placeholders.
+    An accepted expression counts for its first words as well, so that the
+    predictions leading to it rank higher too.
+    """
+
+    def __init__(self, half_life: float = 7 * DAY,
+                 clock: Callable[[], float] = time.time):
+        self.half_life = half_life
+        self.clock = clock
+        self.epoch = clock()
+        self.scores: Dict[str, float] = {}
+
+    def _weight(self, now: float) -> float:
+        return 2.0 ** ((now - self.epoch) / self.half_life)
+
+    def _now(self) -> float:
+        "The time now, rebasing the counters if the epoch is too old"
+        now = self.clock()
+        if now - self.epoch > _MAX_HALF_LIVES * self.half_life:
+            self._rebase(now)
+        return now
+
+    def _rebase(self, now: float):
+        "Moves the epoch to now, dividing all the counters by their weight"
+        # the inverse of the weight: it underflows to 0 after a long gap,
+        # where the weight would overflow
+        factor = 2.0 ** (-(now - self.epoch) / self.half_life)
+        self.scores = {
+            e: s * factor for e, s in self.scores.items()
+            if s * factor >= _MIN_SCORE
+        }
+        self.epoch = now
+
+    def accept(self, completion: str):
+        "Records the use of a completion, e.g. one of the predictions"
+        weight = self._weight(self._now())
+        tokens = completion.split()
+        for i in range(1, len(tokens) + 1):
+            key = " ".join(tokens[:i])
+            self.scores[key] = self.scores.get(key, 0.0) + weight
+
+    def score(self, expression: str) -> float:
+        "The decayed usage count of an expression, as of now"
+        weight = self._weight(self._now())
+        return self.scores.get(" ".join(expression.split()), 0.0) / weight
+
+    def top(self, expressions: Iterable[str],
+            k: Optional[int] = None) -> List[str]:
+        """
+        Returns the k most used expressions, or all of them, most used
+        first. Expressions used as much keep their order.
+        """
+        expressions = list(expressions)
+        if k is None:
+            k = len(expressions)
+        scores = self.scores
+        return heapq.nlargest(
+            k, expressions, key=lambda e: scores.get(e, 0.0)
+        )
+
+    def save(self, path: str):
+        "Writes the counters to path"
+        data = {
+            "half_life": self.half_life,
+            "epoch": self.epoch,
+            "scores": self.scores,
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path: str,
+             clock: Callable[[], float] = time.time) -> "UsageRanking":
+        "Reads the counters written by save"
+        with open(path, "r") as f:
+            data = json.load(f)
+        ranking = cls(data["half_life"], clock)
+        ranking.epoch = data["epoch"]
+        ranking.scores = data["scores"]
+        return ranking
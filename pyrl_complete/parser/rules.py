@@ -6,6 +6,7 @@ Lexer and Parser rules
 
 from typing import List
 import re
+from . import grammar
 
 Paths = List[
     List[str]
@@ -34,7 +35,17 @@ def merge(l1: Paths, l2: Paths) -> Paths:
     return ret
 
 
-paths = []  # this is the output
+def statement_key(text: str) -> str:
+    "The text of a statement with normalized whitespace"
+    return " ".join(text.split())
+
+
+# output of the last Parser.parse call, kept for backwards compatibility.
+# The productions never touch it: during a parse the statements are
+# collected on the ply parser instance (p.parser.statements), which is
+# private to the call. Each statement is a grammar.Fragment, a small graph
+# of tokens, rather than the list of its paths.
+paths = []
 
 # List of token names.   This is always required
 tokens = (
@@ -59,17 +70,17 @@ t_EOS = r";"
 
 
 def t_WORD(t):
-    r"[a-zA-Z_]+"  # a simple ford like: set
-    t.value = [[t.value]]  # the value of the token is now a Paths object
-    return t  # t is a token, its value is a Paths object
+    r"[a-zA-Z_]+|\?+[a-zA-Z_]*"  # a simple word like: set, or ? or ?host
+    t.value = re.sub(r"\?+", "?", t.value)  # remove redundant ?
+    return t  # t is a token, its value is the word
 
 
 def t_OPTION(t):
-    r"-[a-zA-Z]+(\s*\?+)?"  # an optional argument like: -d ? or -abc ?
+    r"-[a-zA-Z]+(\s*\?+[a-zA-Z_]*)?"  # an argument like: -d ? or -h ?host
     token = re.sub(r"\?+", "?", t.value)  # remove redundant ?
     # now format with one space between option letter and ?
     token = re.sub(r"(-[a-zA-Z]+)\s*(\?+)", r"\1 \2", token)
-    t.value = [[token]]
+    t.value = token
     return t
 
 
@@ -107,9 +118,14 @@ def p_line(p):
     | path EOS EOL
     """
     if len(p) > 1:
-        for pt in p[1]:
-            paths.append(pt)
-    pass
+        # the statement text runs from the end of the previous statement
+        # to its separator, and identifies it for Parser.update
+        data = p.lexer.lexdata
+        p.parser.statements.append(p[1])
+        p.parser.texts.append(
+            statement_key(data[p.parser.statement_start:p.lexpos(2)])
+        )
+        p.parser.statement_start = p.lexpos(len(p) - 1) + len(p[len(p) - 1])
 
 
 def p_path(p):
@@ -120,13 +136,10 @@ def p_path(p):
     | path collection
     | path alternatives
     """
-    if len(p) < 2:
-        p[0] = list()
-    elif len(p) < 3:
+    if len(p) < 3:
         p[0] = p[1]
     else:
-        p[0] = merge(p[1], p[2])
-    # paths.append(p[0])
+        p[0] = grammar.sequence(p[1], p[2])
 
 
 def p_group(p):
@@ -140,9 +153,8 @@ def p_optional_group(p):
     """ogroup : LSB alternatives RSB
     | LSB path RSB
     """
-    p[0] = p[2] + [
-        []
-    ]  # this is an optional group so add an empty sub-path as alternative
+    # this is an optional group, so it can also be skipped
+    p[0] = grammar.optional(p[2])
 
 
 def p_alternatives(p):
@@ -152,14 +164,14 @@ def p_alternatives(p):
     | collection OR wrdopt
     | wrdopt OR wrdopt
     """
-    p[0] = p[1] + p[3]
+    p[0] = grammar.choice(p[1], p[3])
 
 
 def p_word_or_option(p):
     """wrdopt : WORD
     | OPTION
     """
-    p[0] = p[1]
+    p[0] = grammar.token(p[1])
 
 
 def p_collection(p):
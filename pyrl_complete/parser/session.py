@@ -0,0 +1,123 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Incremental completion for an input typed one keystroke at a time.
+"""
+
+from itertools import islice
+from typing import Iterator, List, Optional
+from . import matching
+from .tree import Node, Tree, _children, _lookup, _segment
+
+
+class CompletionSession:
+    """
+    Completes successive versions of the same input line against a tree.
+
+    The session keeps the frontier of the last query: the nodes reached
+    through the complete tokens of the input. When the new input keeps
+    those tokens (typing inside the last token, or adding new ones) the
+    frontier is reused and only advanced over the new tokens. Any other
+    edit, or a change of the tree, falls back to a full query.
+    """
+
+    def __init__(self, tree: Tree):
+        self.tree = tree
+        self._reset()
+
+    def _reset(self):
+        self._version = self.tree.version
+        self._tokens: List[str] = []  # complete tokens of the frontier
+        self._frontier = [(self.tree.root, 0, 0, ())]
+
+    def _advance(self, input: str):
+        """
+        Advances the frontier over the complete tokens of the input.
+        Returns the tokens and trailing flag of the input, or None.
+        """
+        parsed = matching.tokenize(input)
+        if parsed is None:
+            return None
+        tokens, trailing = parsed
+        stop = matching.complete_tokens(tokens, trailing)
+        known = len(self._tokens)
+        if (
+            self._version != self.tree.version
+            or stop < known
+            or tokens[:known] != self._tokens
+        ):
+            self._reset()
+            known = 0
+        if stop > known:
+            self._frontier = matching.advance(
+                self._frontier, tokens, known, stop,
+                _children, _segment, _lookup
+            )
+            self._tokens = tokens[:stop]
+        return parsed
+
+    def _matches(self, input: str, subtrees: bool):
+        parsed = self._advance(input)
+        if parsed is None:
+            return []
+        tokens, trailing = parsed
+        return matching.collect(
+            self._frontier, tokens, trailing, _children, _segment, subtrees,
+            _lookup
+        )
+
+    def find_matching_nodes(self, input: str) -> List[Node]:
+        "Find a list of nodes matching the input"
+        return [n for n, _ in self._matches(input, subtrees=True)]
+
+    def iter_suggestions(self, input: str) -> Iterator[str]:
+        "Yields the suggestions one at a time"
+        for node, _ in self._matches(input, subtrees=True):
+            yield node.expression()
+
+    def iter_predictions(self, input: str) -> Iterator[str]:
+        "Yields the predictions one at a time"
+        parsed = self._advance(input)
+        if parsed is None:
+            return
+        nodes = matching.collect_shallowest(
+            self._frontier, *parsed, _children, _segment, _lookup
+        )
+        for node in nodes:
+            yield node.expression()
+
+    def get_suggestions(
+        self, input: str, limit: Optional[int] = None
+    ) -> List[str]:
+        "Returns a list of suggestions based on the input, at most limit"
+        return list(islice(self.iter_suggestions(input), limit))
+
+    def get_predictions(
+        self, input: str, limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        Returns a list of predictions based on the input, at most limit,
+        ranked and filled as Tree.get_predictions does
+        """
+        return self._present(self.iter_predictions(input), input, limit)
+
+    def complete_at(
+        self, line: str, begidx: int, endidx: Optional[int] = None
+    ) -> List[str]:
+        """
+        Returns the completions of the word under the cursor, as
+        Tree.complete_at does
+        """
+        if endidx is None:
+            endidx = len(line)
+        input, _, _ = matching.split_at_cursor(line, begidx, endidx)
+        nodes = (n for n, _ in self._matches(input, subtrees=False))
+        return self.tree._words_at(nodes, line, begidx, endidx)
+
+    def _present(self, predictions, input: str, limit: Optional[int]):
+        return self.tree._present(predictions, input, limit)
+
+    @property
+    def frontier_size(self) -> int:
+        "Number of nodes in the current frontier"
+        return len(self._frontier)
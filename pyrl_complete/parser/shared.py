@@ -0,0 +1,83 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+One compiled completion tree shared by many processes.
+
+Pre-forked workers that each build a Tree hold one copy of the node graph
+each, and even a tree built before the fork is copied page by page as the
+reference counts of its nodes change. A SharedTree instead keeps the tree
+in the .prlc format (see compiled.py) in a block of shared memory: the
+parent creates it once, the workers attach to it by name, and the queries
+read the arrays in place. Only the names reached by the queries are decoded
+in each worker, so the memory used grows little with the number of workers.
+
+A compiled file loaded with compiled.load is shared the same way, through
+the page cache: use SharedTree when the tree is built at runtime.
+"""
+
+import os
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Union
+from .compact import CompactTree
+from .compiled import BufferTree, dumps
+from .tree import Tree
+
+
+class SharedTree(BufferTree):
+    """
+    A read-only completion tree in shared memory. Create it once with
+    SharedTree.create, then attach to it with SharedTree(shm_name) in each
+    worker. The creator unlinks the memory when all are done with it.
+    """
+
+    def __init__(self, name: str):
+        self._shm = _attach(name)
+        self.shm_name = self._shm.name
+        try:
+            super().__init__(self._shm.buf, f"shared memory {name}")
+        except ValueError:
+            self._shm.close()
+            raise
+
+    @classmethod
+    def create(cls, tree: Union[Tree, CompactTree],
+               name: Optional[str] = None) -> "SharedTree":
+        """
+        Copies a tree into a new block of shared memory, with a random name
+        unless given one, and returns it attached
+        """
+        data = dumps(tree)
+        shm = shared_memory.SharedMemory(name, create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        shared = cls.__new__(cls)
+        shared._shm = shm
+        shared.shm_name = shm.name
+        BufferTree.__init__(shared, shm.buf, f"shared memory {shm.name}")
+        return shared
+
+    def close(self):
+        "Detaches from the shared memory"
+        super().close()
+        self._shm.close()
+
+    def unlink(self):
+        "Frees the shared memory, once all the processes have closed it"
+        self._shm.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attaches to an existing block of shared memory. Before Python 3.13 the
+    block is registered with the resource tracker as well, which frees it
+    when the tracker stops. A worker forked or spawned by the creator shares
+    its tracker, where the block is already registered; any other process
+    starts a tracker of its own, and the block is unregistered from it.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    inherited = resource_tracker._resource_tracker._fd is not None
+    shm = shared_memory.SharedMemory(name)
+    if os.name == "posix" and not inherited:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
@@ -0,0 +1,113 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+"""
+Immutable snapshots of a completion tree, for multi-threaded servers.
+
+A Snapshot is a CompactTree that is never changed after it is built, with
+its own ConcurrentCache: any number of threads can query it without locks.
+A SnapshotTree holds the current snapshot. Reloading the grammar builds a
+new snapshot on the side and swaps it in by rebinding one attribute, which
+is atomic: a reader sees either the old snapshot or the new one, complete,
+and the readers already running on the old one carry on undisturbed.
+"""
+
+import threading
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple
+from .cache import ConcurrentCache
+from .compact import CompactTree
+from .parser import Parser
+from .tree import Tree
+
+
+class Snapshot:
+    "A read-only completion tree, with a cache safe to share between threads"
+
+    def __init__(self, tree: CompactTree, version: int = 0,
+                 cache_size: int = 1024):
+        self.tree = tree
+        self.version = version
+        # the caches hold tuples, shared by all the readers
+        self.caches = {
+            "suggestions": ConcurrentCache(cache_size),
+            "predictions": ConcurrentCache(cache_size),
+        }
+
+    def _results(self, kind: str, input: str,
+                 limit: Optional[int]) -> List[str]:
+        cache = self.caches[kind]
+        results: Optional[Tuple[str, ...]] = cache.get(input)
+        if results is None:
+            iterate = getattr(self.tree, "iter_" + kind)
+            if limit is not None:
+                return list(islice(iterate(input), limit))
+            results = tuple(iterate(input))
+            cache.put(input, results)
+        return list(results[:limit])
+
+    def get_suggestions(self, input: str,
+                        limit: Optional[int] = None) -> List[str]:
+        "Returns a list of suggestions based on the input, at most limit"
+        return self._results("suggestions", input, limit)
+
+    def get_predictions(self, input: str,
+                        limit: Optional[int] = None) -> List[str]:
+        "Returns a list of predictions based on the input, at most limit"
+        return self._results("predictions", input, limit)
+
+
+class SnapshotTree:
+    """
+    The current snapshot of a grammar, replaced atomically on reload.
+    Queries never take a lock; only the reloads are serialized.
+    """
+
+    def __init__(self, paths: Iterable[List[str]] = (),
+                 cache_size: int = 1024):
+        self.cache_size = cache_size
+        self._reload_lock = threading.Lock()
+        self._snapshot = Snapshot(CompactTree(paths), 0, cache_size)
+
+    @property
+    def snapshot(self) -> Snapshot:
+        """
+        The current snapshot. Keep it to run several queries on the same
+        version of the grammar.
+        """
+        return self._snapshot
+
+    def reload(self, paths: Iterable[List[str]]) -> Snapshot:
+        "Builds a snapshot of the paths and makes it the current one"
+        with self._reload_lock:
+            snapshot = Snapshot(
+                CompactTree(paths), self._snapshot.version + 1,
+                self.cache_size
+            )
+            self._snapshot = snapshot
+        return snapshot
+
+    def reload_tree(self, tree: Tree) -> Snapshot:
+        "Makes a snapshot of a Tree the current one"
+        with self._reload_lock:
+            snapshot = Snapshot(
+                CompactTree.from_tree(tree), self._snapshot.version + 1,
+                self.cache_size
+            )
+            self._snapshot = snapshot
+        return snapshot
+
+    def reload_rules(self, rules_text: str) -> Snapshot:
+        "Parses rules and makes a snapshot of their paths the current one"
+        parser = Parser()
+        parser.parse(rules_text)
+        return self.reload(parser.iter_paths())
+
+    def get_suggestions(self, input: str,
+                        limit: Optional[int] = None) -> List[str]:
+        "Returns a list of suggestions from the current snapshot"
+        return self._snapshot.get_suggestions(input, limit)
+
+    def get_predictions(self, input: str,
+                        limit: Optional[int] = None) -> List[str]:
+        "Returns a list of predictions from the current snapshot"
+        return self._snapshot.get_predictions(input, limit)
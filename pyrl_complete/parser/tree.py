@@ -1,117 +1,547 @@
 # Copyright (C) 2025 codimoc, codimoc@prismoid.uk
 
-from typing import List, Self, Optional, Dict
-from .rules import Paths
-from ..common.string_utils import find_all_char_positions, remove_first_word
-import re
+from collections import Counter
+from itertools import islice
+from typing import (
+    TYPE_CHECKING, Iterable, Iterator, List, Self, Optional, Dict, Tuple
+)
+from . import matching
+from .cache import CompletionCache
+
+if TYPE_CHECKING:
+    from .dawg import Dawg
+    from .providers import Providers
+    from .ranking import UsageRanking
+    from .session import CompletionSession
 
 
 class Node:
-    "A node in the parse tree"
+    """
+    A node in the parse tree. The depth and the expression are computed
+    once, when the node is created.
+    """
+
+    __slots__ = (
+        "children", "name", "parent", "count", "depth", "segment",
+        "_expression", "_pattern", "_index",
+    )
 
     def __init__(self, name: str, parent: Optional[Self]):
         self.children: Dict[str, Node] = {}  # name -> node map for children
         self.name = name
         self.parent = parent
+        self.count = 0  # number of paths through this node
+        self.segment = tuple(name.split())  # tokens of the name
+        # the expression tokens, built from those of the parent on the
+        # first call to matches
+        self._pattern: Optional[Tuple[str, ...]] = None
+        if parent is None:
+            self.depth = 0
+            self._expression = ""
+            self._pattern = ()
+        else:
+            self.depth = parent.depth + 1
+            self._expression = (
+                f"{parent._expression} {name}" if parent.depth else name
+            )
+        # the children by first token, built on the first lookup and
+        # dropped when the children change
+        self._index: Optional[Dict[str, List[Tuple[int, "Node"]]]] = None
 
     def level(self) -> int:
         "Returns the level of the node in the tree"
-        level = 0
-        node = self
-        while node.parent is not None:
-            level += 1
-            node = node.parent
-        return level
+        return self.depth
 
     def expression(self) -> str:
         "Returns the expression to be matched against the input"
-        if self.name == "root":
-            return ""
-        if self.parent.name == "root":
-            return self.name
-        return f"{self.parent.expression()} {self.name}"
+        return self._expression
 
     def matches(self, input: str) -> bool:
-        exp = self.expression()
-        if "?" not in exp:
-            return exp.startswith(input.lower())
-        # remove double spaces from input
-        input = re.sub(r"\s+", " ", input)
-        # find position of '?' in exp
-        placeholders = find_all_char_positions(exp, "?")
-        if len(placeholders) == 0:
+        """
+        Checks if the expression of the node starts with the input, each
+        placeholder standing for any one word of the input.
+        """
+        parsed = matching.tokenize(input)
+        if parsed is None:
             return False
+        return matching.matches_expression(self._tokens(), *parsed)
+
+    def _tokens(self) -> Tuple[str, ...]:
+        "The tokens of the expression"
+        if self._pattern is None:
+            self._pattern = self.parent._tokens() + self.segment
+        return self._pattern
+
+
+def _children(node: Node) -> Iterable[Node]:
+    return node.children.values()
+
+
+def _segment(node: Node) -> Tuple[str, ...]:
+    return node.segment
+
 
-        while len(placeholders) > 0:
-            p = placeholders[0]
-            input = remove_first_word(input, p)
-            exp = exp[:p] + exp[p + 1:]
-            placeholders = find_all_char_positions(exp, "?")
+def _lookup(node: Node, token: str) -> Iterable[Tuple[int, Node]]:
+    if len(node.children) < matching.INDEX_MIN:
+        return enumerate(node.children.values())
+    if node._index is None:
+        node._index = matching.index_children(node.children.values(),
+                                              _segment)
+    return matching.indexed(node._index, token)
 
-        # remove double spaces from exp
-        exp = re.sub(r"\s+", " ", exp)
-        input = re.sub(r"\s+", " ", input)      
-        return exp.startswith(input.lower())
-    
 
 class Tree:
     "The full parse tree represntation of the grammar"
 
-    def __init__(self, paths: Paths):
+    def __init__(
+        self,
+        paths: Iterable[List[str]],
+        cache_size: int = 1024,
+        cache_bytes: Optional[int] = None,
+    ):
+        """
+        Builds the tree from the paths. Any iterable will do, e.g.
+        Parser.iter_paths(), and it is consumed one path at a time.
+        The completion caches keep at most cache_size inputs and, if given,
+        about cache_bytes bytes each.
+        """
         self.root: Node = Node("root", None)
-        self.cache: Dict[str, List[Node]] = (
-            {}
-        )  # a map from partial string input to Node list
+        # a map from partial string input to Node list
+        self.cache = CompletionCache(cache_size, cache_bytes)
+        # the same for the predictions, the shallowest matching nodes
+        self.prediction_cache = CompletionCache(cache_size, cache_bytes)
+        self.version = 0  # incremented on every change of the tree
+        # orders the predictions by usage when set, see ranking.UsageRanking
+        self.ranking: Optional["UsageRanking"] = None
+        # fill the named placeholders when set, see providers.Providers
+        self.providers: Optional["Providers"] = None
         self._populate_tree_from_paths(paths)
 
-    def _populate_path(self, start_node: Node, path_segments: List[str]):
+    def _populate_path(
+        self, start_node: Node, path_segments: List[str]
+    ) -> Optional[Node]:
         """
         Populates a single path into the tree starting from start_node.
+        Returns the first node created, if any.
         """
         current_node = start_node
+        current_node.count += 1
+        first_new = None
         for segment in path_segments:
             if segment not in current_node.children:
                 current_node.children[segment] = Node(segment, current_node)
+                current_node._index = None
+                if first_new is None:
+                    first_new = current_node.children[segment]
             current_node = current_node.children[segment]
+            current_node.count += 1
+        return first_new
+
+    def _path_nodes(
+        self, path_segments: Iterable[str]
+    ) -> Tuple[List[Node], int]:
+        """
+        Returns the nodes of a path, from the root, and how many paths
+        end at its last node. Raises KeyError if the path is not in the
+        tree, or if no path ends there: the segments are only the prefix
+        of longer paths.
+        """
+        nodes = [self.root]
+        for segment in path_segments:
+            if segment not in nodes[-1].children:
+                raise KeyError(f"path not in tree: {list(path_segments)}")
+            nodes.append(nodes[-1].children[segment])
+        last = nodes[-1]
+        ending = last.count - sum(c.count for c in last.children.values())
+        if ending <= 0:
+            raise KeyError(f"path not in tree: {list(path_segments)}")
+        return nodes, ending
 
-    def _populate_tree_from_paths(self, paths_list: Paths):
-        "Populate the entire tree from the list of paths"
+    def _remove_path(self, path_segments: List[str]) -> Optional[Node]:
+        """
+        Removes a single path from the tree, dropping the nodes no other
+        path goes through. Returns the topmost node dropped, if any.
+        """
+        nodes, _ = self._path_nodes(path_segments)
+        self.root.count -= 1
+        first_removed = None
+        for node in nodes[1:]:
+            node.count -= 1
+            if node.count == 0 and first_removed is None:
+                first_removed = node
+                node.parent.children.pop(node.name)
+                node.parent._index = None
+        return first_removed
+
+    def patch(self, added: Iterable[List[str]], removed: Iterable[List[str]]):
+        """
+        Adds and removes paths in place, e.g. with the output of
+        Parser.update. Only the cached completions that could involve the
+        nodes added or removed are dropped from the cache. Raises KeyError,
+        leaving the tree as it was, if a path to remove is not in the tree
+        as many times as it is removed.
+        """
+        removed = list(removed)
+        # all the paths are checked before any is removed
+        for path, times in Counter(tuple(p) for p in removed).items():
+            _, ending = self._path_nodes(path)
+            if ending < times:
+                raise KeyError(
+                    f"path not in tree {times} times: {list(path)}"
+                )
+        changed = [self._remove_path(p) for p in removed]
+        changed += [self._populate_path(self.root, p) for p in added]
+        self.version += 1
+        self._invalidate([n for n in changed if n is not None])
+
+    def add_path(self, path: List[str]):
+        """
+        Adds a path, e.g. ["plugin", "run", "-f ?"], creating only the
+        nodes it does not share with other paths
+        """
+        self.patch([path], [])
+
+    def remove_path(self, path: List[str]):
+        """
+        Removes a path, dropping the branch that no other path goes
+        through. Raises KeyError if the path is not in the tree.
+        """
+        self.patch([], [path])
+
+    def prune(self, prefix: List[str]) -> int:
+        """
+        Removes the node at the end of prefix and everything below it,
+        e.g. all the commands of a plugin, and returns the number of paths
+        removed. Raises KeyError if prefix is not in the tree.
+        """
+        node = self.root
+        for segment in prefix:
+            if segment not in node.children:
+                raise KeyError(f"prefix not in tree: {prefix}")
+            node = node.children[segment]
+        removed = node.count
+        if node is self.root:
+            self.root.children.clear()
+            self.root._index = None
+            self.root.count = 0
+            self.version += 1
+            self.cache.clear()
+            self.prediction_cache.clear()
+            return removed
+        # the topmost node left without paths is detached from its parent
+        top = node
+        while node is not None:
+            node.count -= removed
+            if node.count == 0 and node.parent is not None:
+                top = node
+            node = node.parent
+        top.parent.children.pop(top.name)
+        top.parent._index = None
+        self.version += 1
+        self._invalidate([top])
+        return removed
+
+    def add_paths_from_rules(self, rules_text: str) -> int:
+        """
+        Parses rules, e.g. the commands of a plugin, and adds their paths.
+        Returns the number of paths added.
+        """
+        from .parser import Parser
+        parser = Parser()
+        parser.parse(rules_text)
+        paths = list(parser.iter_paths())
+        self.patch(paths, [])
+        return len(paths)
+
+    def _invalidate(self, changed: List[Node]):
+        "Drops the cached inputs that could match any of the changed nodes"
+        if not changed:
+            return
+        expressions = [n.expression().split() for n in changed]
+
+        def affected(input: str) -> bool:
+            parsed = matching.tokenize(input)
+            return parsed is not None and any(
+                matching.reaches(e, *parsed) for e in expressions
+            )
+
+        self.cache.discard_if(affected)
+        self.prediction_cache.discard_if(affected)
+
+    def _populate_tree_from_paths(self, paths_list: Iterable[List[str]]):
+        "Populate the entire tree from the list, or iterator, of paths"
         for p in paths_list:
             self._populate_path(self.root, p)
 
     def find_matching_nodes(self, input: str, root: Node = None) -> List[Node]:
-        "Find a list of nodes matching the input"
+        """
+        Find a list of nodes matching the input. The tree is descended along
+        the tokens of the input, only the subtrees below the last token are
+        enumerated.
+        """
         if root is None:
             root = self.root
         # only use the cache at the root of the tree
-        if root.level() == 0 and input in self.cache:
-            return self.cache[input]
-        nodes = []
-        if root.matches(input):
-            nodes.append(root)
-        for n in root.children.values():
-            nodes.extend(self.find_matching_nodes(input, n))
+        if root is self.root:
+            nodes = self.cache.get(input)
+            if nodes is not None:
+                return nodes
+        matches = matching.iter_matches(
+            root, input, _children, _segment,
+            prefix=tuple(root.expression().split()), depth=root.depth,
+            lookup=_lookup
+        )
+        nodes = [n for n, _ in matches]
         # only at root level
-        if root.level() == 0:
-            self.cache[input] = nodes
+        if root is self.root:
+            self.cache.put(input, nodes)
+        return nodes
+
+    def find_predicted_nodes(self, input: str, root: Node = None) -> List[Node]:
+        """
+        Find the nodes matching the input at the minimum depth. The tree is
+        searched level by level below the last complete token, and the
+        levels below the first one with matches are never visited.
+        """
+        if root is None:
+            root = self.root
+        if root is self.root:
+            nodes = self.prediction_cache.get(input)
+            if nodes is not None:
+                return nodes
+        nodes = matching.shallowest_matches(
+            root, input, _children, _segment,
+            prefix=tuple(root.expression().split()), depth=root.depth,
+            lookup=_lookup
+        )
+        if root is self.root:
+            self.prediction_cache.put(input, nodes)
         return nodes
 
-    def get_suggestions(self, input: str, root: Node = None) -> List[str]:
-        "Returns a list of suggestions based on the input"
+    def iter_nodes(self, input: str, root: Node = None) -> Iterator[Node]:
+        """
+        Yields the nodes matching the input, in the order of
+        find_matching_nodes. The tree is searched only as far as the
+        caller reads, and the result is cached once it is read to the end.
+        """
         if root is None:
             root = self.root
-        nodes = self.find_matching_nodes(input, root)
-        return [n.expression() for n in nodes]
+        if root is self.root:
+            nodes = self.cache.get(input)
+            if nodes is not None:
+                yield from nodes
+                return
+        matches = matching.iter_matches(
+            root, input, _children, _segment,
+            prefix=tuple(root.expression().split()), depth=root.depth,
+            lookup=_lookup
+        )
+        version = self.version
+        nodes = []
+        for node, _ in matches:
+            nodes.append(node)
+            yield node
+        if root is self.root and version == self.version:
+            self.cache.put(input, nodes)
+
+    def _fuzzy_matches(
+        self, input: str, root: Node, max_edits: int, subtrees: bool
+    ) -> List[Tuple[Node, int, int]]:
+        "The (node, depth, edits) triples of the fuzzy search, not cached"
+        return list(matching.fuzzy_matches(
+            root, input, _children, _segment, max_edits, subtrees,
+            prefix=tuple(root.expression().split()), depth=root.depth
+        ))
+
+    def iter_suggestions(
+        self, input: str, root: Node = None, max_edits: int = 0
+    ) -> Iterator[str]:
+        """
+        Yields the suggestions one at a time, see iter_nodes. With
+        max_edits, the input may be misspelled by up to max_edits edits
+        and the suggestions come by increasing number of edits.
+        """
+        if max_edits:
+            if root is None:
+                root = self.root
+            matches = self._fuzzy_matches(input, root, max_edits, True)
+            for node, _, _ in sorted(matches, key=lambda m: m[2]):
+                yield node.expression()
+            return
+        for node in self.iter_nodes(input, root):
+            yield node.expression()
 
-    def get_predictions(self, input: str, root: Node = None) -> List[str]:
-        "Returns a list of predictions based on the input"
+    def iter_predictions(
+        self, input: str, root: Node = None, max_edits: int = 0
+    ) -> Iterator[str]:
+        """
+        Yields the predictions one at a time. With max_edits, the input may
+        be misspelled by up to max_edits edits and the predictions come by
+        increasing number of edits.
+        """
         if root is None:
             root = self.root
-        nodes = self.find_matching_nodes(input, root)
-        nodes = [n for n in nodes if n.name != "root"]
-        min_level = 10000
-        for n in nodes:
-            if n.level() < min_level:
-                min_level = n.level()
-        nodes = [n for n in nodes if n.level() == min_level]
-        return [n.expression() for n in nodes]
+        if max_edits:
+            matches = self._fuzzy_matches(input, root, max_edits, False)
+            for node in matching.ranked(matches):
+                yield node.expression()
+            return
+        for node in self.find_predicted_nodes(input, root):
+            yield node.expression()
+
+    def get_suggestions(
+        self,
+        input: str,
+        root: Node = None,
+        limit: Optional[int] = None,
+        max_edits: int = 0,
+    ) -> List[str]:
+        """
+        Returns a list of suggestions based on the input, at most limit
+        of them if given. See iter_suggestions for max_edits.
+        """
+        if limit is None and not max_edits:
+            nodes = self.find_matching_nodes(input, root)
+            return [n.expression() for n in nodes]
+        suggestions = self.iter_suggestions(input, root, max_edits)
+        return list(islice(suggestions, limit))
+
+    def get_predictions(
+        self,
+        input: str,
+        root: Node = None,
+        limit: Optional[int] = None,
+        max_edits: int = 0,
+    ) -> List[str]:
+        """
+        Returns a list of predictions based on the input, at most limit
+        of them if given. See iter_predictions for max_edits. With a
+        ranking, the most used predictions come first, and with providers
+        the named placeholders are replaced by their values.
+        """
+        predictions = self.iter_predictions(input, root, max_edits)
+        return self._present(predictions, input, limit)
+
+    def _present(
+        self, predictions: Iterable[str], input: str, limit: Optional[int]
+    ) -> List[str]:
+        """
+        Orders the predictions by usage and fills their placeholders with
+        the values of the providers, if the tree has a ranking and providers
+        """
+        if self.ranking is not None:
+            predictions = self.ranking.top(predictions, limit)
+        if self.providers is not None:
+            # each prediction is filled into one or more, and the values
+            # of all are waited for at once
+            predictions = self.providers.fill(
+                islice(predictions, limit), input
+            )
+        return list(islice(predictions, limit))
+
+    def accept(self, line: str):
+        """
+        Records the use of a command line with the ranking of the tree, if
+        any. The line is matched against the tree, its values filling the
+        placeholders, and the expressions of the nodes it ends on are
+        counted: "set user -name bob" counts for "set user -name ?". A line
+        the tree does not reach is counted as it is.
+        """
+        if self.ranking is None:
+            return
+        parsed = matching.tokenize(line)
+        if parsed is None:
+            return
+        tokens = parsed[0]
+        frontier = matching.advance(
+            [(self.root, 0, 0, ())], tokens, 0, len(tokens),
+            _children, _segment, _lookup
+        )
+        # the frontier keeps the nodes ending on the last token
+        expressions = [
+            node.expression() for node, consumed, depth, _ in frontier
+            if consumed == len(tokens) and depth > 0
+        ]
+        for expression in expressions or [line]:
+            self.ranking.accept(expression)
+
+    def complete_at(
+        self, line: str, begidx: int, endidx: Optional[int] = None
+    ) -> List[str]:
+        """
+        Returns the completions of the word under the cursor, the text
+        line[begidx:endidx] as readline gives it (endidx defaults to the
+        end of the line). Only the line before endidx is matched, the rest
+        is left alone, and each completion replaces just that text. The
+        placeholders are completed with the values of the providers.
+        """
+        if endidx is None:
+            endidx = len(line)
+        input, _, _ = matching.split_at_cursor(line, begidx, endidx)
+        matches = matching.iter_matches(
+            self.root, input, _children, _segment, subtrees=False,
+            lookup=_lookup
+        )
+        return self._words_at((n for n, _ in matches), line, begidx, endidx)
+
+    def _words_at(
+        self, nodes: Iterable[Node], line: str, begidx: int, endidx: int
+    ) -> List[str]:
+        "The replacements of line[begidx:endidx] from the matching nodes"
+        _, index, offset = matching.split_at_cursor(line, begidx, endidx)
+        typed = line[begidx - offset:endidx]
+
+        providers = self.providers
+        deadline = None if providers is None else providers.deadline()
+
+        def values(name: str) -> List[str]:
+            if providers is None or name not in providers:
+                return []
+            return providers.values(name, deadline)
+
+        expressions = (tuple(n.expression().split()) for n in nodes)
+        words = matching.words_at(expressions, index, typed, values)
+        return [w[offset:] for w in words]
+
+    def get_suggestions_many(self, inputs: Iterable[str]) -> List[List[str]]:
+        """
+        Returns the list of suggestions of each input, in input order.
+        Inputs sharing their first tokens descend the tree together, see
+        matching.match_many. The completion cache is not used.
+        """
+        matches = matching.match_many(
+            self.root, list(inputs), _children, _segment, lookup=_lookup
+        )
+        return [[n.expression() for n, _ in m] for m in matches]
+
+    def get_predictions_many(self, inputs: Iterable[str]) -> List[List[str]]:
+        """
+        Returns the list of predictions of each input, in input order.
+        Inputs sharing their first tokens descend the tree together, see
+        matching.match_many. The completion cache is not used. They are
+        ranked and filled as get_predictions does.
+        """
+        inputs = list(inputs)
+        matches = matching.match_many(
+            self.root, inputs, _children, _segment, subtrees=False,
+            lookup=_lookup
+        )
+        return [
+            self._present(
+                [n.expression() for n in matching.shallowest(m)], i, None
+            )
+            for i, m in zip(inputs, matches)
+        ]
+
+    def minimize(self) -> "Dawg":
+        """
+        Returns a read-only copy of the tree where the identical subtrees
+        are shared, see dawg.Dawg
+        """
+        from .dawg import Dawg
+        return Dawg(self)
+
+    def session(self) -> "CompletionSession":
+        "Returns a new incremental completion session on this tree"
+        from .session import CompletionSession
+        return CompletionSession(self)
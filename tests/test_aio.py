@@ -0,0 +1,127 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import asyncio
+import time
+import pytest
+from pyrl_complete.parser import AsyncCompleter, CompactTree, Tree
+
+
+@pytest.fixture()
+def tree():
+    paths = [[f"cmd_{i}", sub] for i in range(100) for sub in ("show", "set")]
+    yield Tree(paths)
+
+
+def test_same_as_tree(tree: Tree):
+    completer = AsyncCompleter(tree, chunk_size=7)
+
+    async def run():
+        return (await completer.get_suggestions("cmd_1"),
+                await completer.get_predictions("cmd_1 "),
+                await completer.get_suggestions("", limit=10))
+
+    suggestions, predictions, limited = asyncio.run(run())
+    assert suggestions == tree.get_suggestions("cmd_1")
+    assert predictions == tree.get_predictions("cmd_1 ")
+    assert limited == tree.get_suggestions("", limit=10)
+
+
+def test_yields_to_the_loop(tree: Tree):
+    completer = AsyncCompleter(CompactTree.from_tree(tree), chunk_size=10)
+    ticks = []
+
+    async def ticker():
+        for i in range(1000):
+            ticks.append(i)
+            await asyncio.sleep(0)
+
+    async def run():
+        task = asyncio.create_task(ticker())
+        suggestions = await completer.get_suggestions("")
+        task.cancel()
+        return suggestions
+
+    suggestions = asyncio.run(run())
+    assert len(suggestions) == 301
+    # the loop ran between the chunks
+    assert len(ticks) >= 30
+
+
+class SlowTree:
+    "Blocks for a while before the first result and in _present"
+
+    def iter_suggestions(self, input):
+        time.sleep(0.2)
+        yield from (f"{input}{i}" for i in range(100))
+
+    iter_predictions = iter_suggestions
+
+    def _present(self, predictions, input, limit):
+        time.sleep(0.2)
+        return predictions[:limit]
+
+
+def test_does_not_block_the_loop():
+    completer = AsyncCompleter(SlowTree(), chunk_size=16)
+    gaps = []
+
+    async def ticker():
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    async def run():
+        task = asyncio.create_task(ticker())
+        predictions = await completer.get_predictions("x", limit=3)
+        task.cancel()
+        return predictions
+
+    assert asyncio.run(run()) == ["x0", "x1", "x2"]
+    completer.close()
+    # 0.4 s of work, while the loop kept ticking every 10 ms
+    assert len(gaps) >= 20
+    assert max(gaps) < 0.1
+
+
+def test_only_latest_is_delivered(tree: Tree):
+    completer = AsyncCompleter(tree, chunk_size=10)
+
+    async def run():
+        return await asyncio.gather(
+            completer.get_suggestions("c"),
+            completer.get_suggestions("cm"),
+            completer.get_predictions("cmd_12"),
+        )
+
+    first, second, third = asyncio.run(run())
+    assert first is None
+    assert second is None
+    assert third == ["cmd_12"]
+    # the superseded searches were not cached half done
+    assert "c" not in tree.cache
+
+
+def test_cancel(tree: Tree):
+    completer = AsyncCompleter(tree, chunk_size=10)
+
+    async def run():
+        task = asyncio.create_task(completer.get_suggestions(""))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert "" not in tree.cache
+
+
+def test_session(tree: Tree):
+    completer = AsyncCompleter(tree.session())
+
+    async def run():
+        return await completer.get_predictions("cmd_5 ")
+
+    assert asyncio.run(run()) == ["cmd_5 show", "cmd_5 set"]
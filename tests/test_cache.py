@@ -0,0 +1,80 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+from pyrl_complete.parser import Tree
+from pyrl_complete.parser.cache import (
+    CompletionCache,
+    ConcurrentCache,
+    normalize,
+)
+
+
+def test_normalize():
+    assert normalize("Get   Status ") == "get status "
+    assert normalize("get\tstatus") == "get status"
+
+
+def test_hits_and_misses():
+    cache = CompletionCache()
+    assert cache.get("get") is None
+    cache.put("get", [1, 2])
+    assert cache.get("GET") == [1, 2]
+    assert "get" in cache
+    assert (cache.hits, cache.misses, cache.size) == (1, 1, 1)
+
+
+def test_lru_eviction():
+    cache = CompletionCache(max_entries=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    cache.get("a")  # b is now the least recently used
+    cache.put("c", [3])
+    assert list(cache) == ["a", "c"]
+    assert cache.evictions == 1
+
+
+def test_byte_limit():
+    cache = CompletionCache(max_bytes=300)
+    cache.put("a", list(range(10)))
+    assert cache.bytes > 0
+    cache.put("b", list(range(20)))
+    assert "a" not in cache
+    assert "b" in cache
+    assert cache.bytes <= 300
+    cache.clear()
+    assert cache.bytes == 0 and len(cache) == 0
+
+
+def test_discard_if():
+    cache = CompletionCache()
+    for key in ("get a", "get b", "set a"):
+        cache.put(key, [])
+    cache.discard_if(lambda key: key.startswith("get"))
+    assert list(cache) == ["set a"]
+
+
+def test_tree_cache_is_bounded():
+    tree = Tree([["get", "one"], ["set", "one"]], cache_size=2)
+    tree.get_suggestions("get ")
+    tree.get_suggestions("Get  ")  # same key
+    assert tree.cache.hits == 1
+    tree.get_suggestions("set ")
+    tree.get_suggestions("")
+    assert len(tree.cache) == 2
+    assert "get " not in tree.cache
+    assert tree.cache.evictions == 1
+
+
+def test_concurrent_cache_generations():
+    cache = ConcurrentCache(max_entries=4)
+    cache.put("a", (1,))
+    cache.put("b", (2,))  # the young generation is full: a, b are old
+    cache.put("c", (3,))
+    assert cache.get("A") == (1,)  # a hit in the old generation moves a
+    cache.put("d", (4,))  # young was c, a: now old, b is dropped
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache and "d" in cache
+    assert cache.size <= 4
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert cache.get("b") is None
+    cache.clear()
+    assert len(cache) == 0
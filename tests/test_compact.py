@@ -0,0 +1,77 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import pytest
+from pyrl_complete.parser import Parser, Tree
+from pyrl_complete.parser import compiled
+from pyrl_complete.parser.compact import CompactTree, flatten
+
+RULES = """get (status | version);
+set (user | group) -name ? [-id ?];
+show [config | interfaces] [-v];
+secret_wallet get -d ? -a ? end;
+exit;
+"""
+
+
+@pytest.fixture()
+def parser():
+    parser = Parser()
+    parser.parse(RULES)
+    yield parser
+
+
+def test_compact_layout():
+    compact = CompactTree([["get", "one"], ["get", "two"], ["set"]])
+    assert len(compact) == 5
+    assert list(compact.symbols) == [0, 1, 4, 2, 3]
+    assert compact.names == ["", "get", "one", "two", "set"]
+    assert list(compact.parents) == [0, 0, 0, 1, 1]
+    assert list(compact.children) == [1, 3, 5, 5, 5, 5]
+    assert compact.expression(4) == "get two"
+
+
+def test_compact_same_layout_as_flatten(parser: Parser):
+    tree = Tree(parser.iter_paths())
+    compact = CompactTree(parser.iter_paths())
+    symbols, parents, children, names = flatten(tree)
+    assert [names[s] for s in symbols] == [
+        compact.name(i) for i in range(len(compact))
+    ]
+    assert compact.parents == parents
+    assert compact.children == children
+
+
+@pytest.mark.parametrize(
+    "input",
+    ["", "g", "get ", "set user -name x ", "set user -name x -i",
+     "show ", "secret_wallet get -d v -a ", "zz", " get"],
+)
+def test_compact_same_as_tree(parser: Parser, input: str):
+    tree = Tree(parser.iter_paths())
+    for compact in (CompactTree(parser.iter_paths()),
+                    CompactTree.from_tree(tree)):
+        assert compact.get_suggestions(input) == tree.get_suggestions(input)
+        assert sorted(compact.get_predictions(input)) == sorted(
+            tree.get_predictions(input)
+        )
+
+
+def test_write_compact(parser: Parser, tmp_path):
+    compact = CompactTree(parser.iter_paths())
+    path = str(tmp_path / "rules.prlc")
+    compiled.write(compact, path)
+    with compiled.load(path) as mapped:
+        assert mapped.get_suggestions("") == compact.get_suggestions("")
+
+
+def test_compact_limit_stops_search(parser: Parser):
+    compact = CompactTree(parser.iter_paths())
+    visited = []
+    children = compact._children
+    compact._children = lambda node: visited.append(node) or children(node)
+    assert compact.get_suggestions("", limit=3) == ["", "get", "get status"]
+    everything = len(visited)
+    visited.clear()
+    compact.get_suggestions("")
+    assert everything < len(visited)
+    assert compact.get_predictions("s", limit=1) == ["set"]
@@ -0,0 +1,67 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import pytest
+from pyrl_complete.apps.compiler import main
+from pyrl_complete.parser import Parser, Tree
+from pyrl_complete.parser import compiled
+
+RULES = """get (status | version);
+set (user | group) -name ? [-id ?];
+show [config | interfaces] [-v];
+secret_wallet get -d ? -a ? end;
+exit;
+"""
+
+
+@pytest.fixture()
+def tree():
+    parser = Parser()
+    parser.parse(RULES)
+    yield Tree(parser.iter_paths())
+
+
+def test_flatten(tree: Tree):
+    symbols, parents, children, names = compiled.flatten(tree)
+    assert len(symbols) == len(parents) == len(children) - 1
+    assert names[0] == ""
+    # children of each node are contiguous, in breadth first order
+    root_children = [names[symbols[i]] for i in range(children[0],
+                                                      children[1])]
+    assert root_children == list(tree.root.children)
+    # repeated names are stored once
+    assert len(names) == len(set(names))
+    assert names.count("get") == 1
+
+
+@pytest.mark.parametrize(
+    "input",
+    ["", "g", "get ", "set user -name x ", "set user -name x -i",
+     "show ", "secret_wallet get -d v -a ", "zz", " get"],
+)
+def test_mapped_tree_same_as_tree(tree: Tree, tmp_path, input):
+    path = tmp_path / "rules.prlc"
+    compiled.write(tree, str(path))
+    with compiled.load(str(path)) as mapped:
+        assert len(mapped) == len(list(tree.get_suggestions("")))
+        assert mapped.get_suggestions(input) == tree.get_suggestions(input)
+        assert sorted(mapped.get_predictions(input)) == sorted(
+            tree.get_predictions(input)
+        )
+
+
+def test_load_bad_file(tmp_path):
+    path = tmp_path / "rules.prlc"
+    path.write_bytes(b"not a compiled file at all")
+    with pytest.raises(ValueError):
+        compiled.load(str(path))
+
+
+def test_compile_command(tmp_path, capsys):
+    rules = tmp_path / "rules.prl"
+    rules.write_text(RULES)
+    main([str(rules)])
+    assert "14 paths compiled" in capsys.readouterr().out
+    with compiled.load(str(tmp_path / "rules.prlc")) as mapped:
+        assert mapped.get_predictions("get ") == [
+            "get status", "get version"
+        ]
@@ -0,0 +1,50 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import pytest
+from pyrl_complete.parser import Dawg, Parser, Tree
+
+RULES = """get (status | version) [-v] [-o ?] [-f ?];
+set (user | group) -name ? [-v] [-o ?] [-f ?];
+show [config | interfaces] [-v] [-o ?] [-f ?];
+secret_wallet get -d ? -a ? end;
+"""
+
+
+@pytest.fixture()
+def parser():
+    parser = Parser()
+    parser.parse(RULES)
+    yield parser
+
+
+def test_shared_tails(parser: Parser):
+    tree = Tree(parser.iter_paths())
+    dawg = tree.minimize()
+    assert isinstance(dawg, Dawg)
+    assert dawg.source_nodes == 66
+    assert len(dawg) == 19
+    get = dawg.root.children[0]
+    status, version = get.children
+    assert all(a is b for a, b in zip(status.children, version.children))
+    assert sorted(dawg.iter_paths()) == sorted(parser.paths)
+
+
+def test_shared_node_expressions():
+    dawg = Tree([["a", "x"], ["b", "x"]]).minimize()
+    assert len(dawg) == 4
+    assert dawg.get_suggestions("") == ["", "a", "a x", "b", "b x"]
+    assert dawg.get_predictions("b ") == ["b x"]
+
+
+@pytest.mark.parametrize(
+    "input",
+    ["", "g", "get ", "get status -o x ", "set user -name x -",
+     "show ", "show config -v -f", "secret_wallet get -d v -a ", "zz",
+     " get"],
+)
+def test_dawg_same_as_tree(parser: Parser, input: str):
+    tree = Tree(parser.iter_paths())
+    dawg = tree.minimize()
+    assert dawg.get_suggestions(input) == tree.get_suggestions(input)
+    assert dawg.get_predictions(input) == tree.get_predictions(input)
+    assert dawg.get_predictions_many([input]) == [tree.get_predictions(input)]
@@ -0,0 +1,89 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+from pyrl_complete.parser import Parser, Tree
+from pyrl_complete.parser import grammar
+import pytest
+
+RULES = """get (status | version);
+set (user | group) -name ? [-id ?];
+show [config | interfaces] [-v];
+secret_wallet get -d ? -a ? end;
+exit;
+"""
+
+
+@pytest.fixture()
+def my_parser():
+    parser = Parser()
+    parser.parse(RULES)
+    yield parser
+
+
+def test_fragments_paths():
+    f = grammar.sequence(
+        grammar.token("one"),
+        grammar.optional(
+            grammar.choice(grammar.token("get"), grammar.token("test"))
+        ),
+    )
+    assert list(grammar.iter_statement_paths(f)) == [
+        ["one", "get"],
+        ["one", "test"],
+        ["one"],
+    ]
+
+
+def test_paths_view_is_lazy(my_parser: Parser):
+    assert my_parser.paths._paths is None
+    assert ["exit"] in my_parser.paths
+    assert len(my_parser.paths) == 14
+    assert my_parser.paths[0] == ["get", "status"]
+    assert my_parser.paths == list(my_parser.grammar.iter_paths())
+
+
+def test_graph_is_linear_in_grammar_size():
+    parser = Parser()
+    parser.parse("cmd" + " [a | b]" * 30 + ";")
+    # 3^30 paths, but only a handful of vertices per group
+    vertices = set()
+    stack = [parser.grammar.statements[0][0]]
+    while stack:
+        v = stack.pop()
+        if id(v) not in vertices:
+            vertices.add(id(v))
+            stack.extend(v.next)
+    assert len(vertices) < 30 * 10
+    assert parser.grammar.get_predictions("cmd a b ") == [
+        "cmd a b a", "cmd a b b"
+    ]
+    assert parser.grammar.get_predictions("cmd " + "b " * 30) == []
+
+
+@pytest.mark.parametrize(
+    "input",
+    [
+        "", "g", "get", "get ", "get s", "set user -name",
+        "set user -name x", "set user -name x ", "set user -name x -i",
+        "set user -name x -id y ", "show ", "show config -v", "sh",
+        "secret_wallet get -d v -a ", "secret_wallet get -d v ",
+        "zz", " get", "exit ",
+    ],
+)
+def test_graph_completion_same_as_tree(my_parser: Parser, input: str):
+    tree = Tree(my_parser.paths)
+    assert sorted(my_parser.grammar.get_suggestions(input)) == sorted(
+        tree.get_suggestions(input)
+    )
+    assert sorted(my_parser.grammar.get_predictions(input)) == sorted(
+        tree.get_predictions(input)
+    )
+
+
+def test_graph_iter_suggestions(my_parser: Parser):
+    grammar = my_parser.grammar
+    suggestions = grammar.get_suggestions("set ")
+    assert list(grammar.iter_suggestions("set ")) == suggestions
+    assert grammar.get_suggestions("set ", limit=4) == suggestions[:4]
+    assert list(grammar.iter_predictions("set ")) == grammar.get_predictions(
+        "set "
+    )
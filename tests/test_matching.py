@@ -0,0 +1,225 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import pytest
+from pyrl_complete.parser.matching import (
+    complete_tokens,
+    edit_distance,
+    fuzzy_matches,
+    index_children,
+    indexed,
+    iter_matches,
+    match_many,
+    matches_expression,
+    shallowest,
+    shallowest_matches,
+    tokenize,
+)
+
+
+@pytest.mark.parametrize(
+    "input, expected",
+    [
+        ("", ([], False)),
+        ("get", (["get"], False)),
+        ("get ", (["get"], True)),
+        ("Get  Status", (["get", "status"], False)),
+        (" get", None),
+        (" ", None),
+    ],
+)
+def test_tokenize(input, expected):
+    assert tokenize(input) == expected
+
+
+def test_complete_tokens():
+    assert complete_tokens([], False) == 0
+    assert complete_tokens(["get"], False) == 0
+    assert complete_tokens(["get"], True) == 1
+    assert complete_tokens(["get", "st"], False) == 1
+
+
+@pytest.mark.parametrize(
+    "input, expected",
+    [
+        ("", True),
+        ("sh", True),
+        ("show -d x", True),
+        ("show -d x ", True),
+        ("show -d ", True),
+        ("show -d x end", True),
+        ("show -d x end ", False),
+        ("show x", False),
+        ("show -d x end more", False),
+    ],
+)
+def test_matches_expression(input, expected):
+    expression = ("show", "-d", "?", "end")
+    assert matches_expression(expression, *tokenize(input)) == expected
+
+
+# a tiny trie made of nested tuples: (name, [children])
+TRIE = ("", [
+    ("show", [("config", [("running", [])]), ("-d ?", [("end", [])])]),
+    ("set", []),
+])
+
+
+def children(node):
+    return node[1]
+
+
+def segment(node):
+    return tuple(node[0].split())
+
+
+def names(matches):
+    return [node[0] for node, _ in matches]
+
+
+def test_iter_matches():
+    assert names(iter_matches(TRIE, "", children, segment)) == [
+        "", "show", "config", "running", "-d ?", "end", "set"
+    ]
+    assert names(iter_matches(TRIE, "show c", children, segment)) == [
+        "config", "running"
+    ]
+    assert names(iter_matches(TRIE, "show -d x", children, segment)) == [
+        "-d ?", "end"
+    ]
+    assert names(iter_matches(TRIE, "show -d x ", children, segment)) == [
+        "-d ?", "end"
+    ]
+    assert names(iter_matches(TRIE, "show ", children, segment)) == [
+        "config", "running", "-d ?", "end"
+    ]
+    assert names(iter_matches(TRIE, "sh x", children, segment)) == []
+
+
+# wider than INDEX_MIN, with placeholders and multi-token children
+WIDE = ("", [
+    ("a0", [("x", [])]), ("a1", [("y", [])]), ("?v", [("z", [])]),
+    ("a1 -f", [("w", [])]), ("a2", []), ("a3", []), ("a4", []),
+    ("?", [("a1", [])]), ("a5", []), ("a6", []),
+])
+
+
+def lookup(node, token):
+    return indexed(index_children(node[1], segment), token)
+
+
+@pytest.mark.parametrize(
+    "input",
+    ["", "a", "a1", "a1 ", "a1 -f ", "a1 -f w ", "q ", "q z", "a1 a1 ",
+     "zz ", "? "],
+)
+def test_lookup_same_as_children(input):
+    assert list(iter_matches(WIDE, input, children, segment)) == list(
+        iter_matches(WIDE, input, children, segment, lookup=lookup)
+    )
+
+
+def test_indexed():
+    index = index_children(WIDE[1], segment)
+    assert [p for p, _ in indexed(index, "a1")] == [1, 2, 3, 7]
+    assert [p for p, _ in indexed(index, "zz")] == [2, 7]
+    assert [p for p, _ in indexed(index, "?")] == [2, 7]
+
+
+def test_match_many_shares_prefixes():
+    trie = ("", [
+        ("net", [("if", [
+            (f"eth{i}", [("up", []), ("down", [])]) for i in range(5)
+        ])]),
+        ("set", []),
+    ])
+    expanded = []
+
+    def counting_children(node):
+        expanded.append(node[0])
+        return node[1]
+
+    lines = [f"net if eth{i} u" for i in range(5)]
+    assert match_many(trie, lines, counting_children, segment) == [
+        list(iter_matches(trie, line, children, segment)) for line in lines
+    ]
+    # the lines share "net if": the nodes above it are expanded once
+    assert expanded.count("") == 1
+    assert expanded.count("net") == 1
+
+
+def test_shallowest():
+    matches = iter_matches(TRIE, "show ", children, segment, subtrees=False)
+    assert [n[0] for n in shallowest(matches)] == ["config", "-d ?"]
+
+
+@pytest.mark.parametrize(
+    "input",
+    ["", "s", "show", "show ", "show c", "show -d x", "show -d x ",
+     "show -d x e", "sh x", "set ", " "],
+)
+def test_shallowest_matches_same_as_shallowest(input):
+    matches = iter_matches(TRIE, input, children, segment, subtrees=False)
+    assert shallowest_matches(TRIE, input, children, segment) == (
+        shallowest(matches)
+    )
+
+
+def test_shallowest_matches_skips_deeper_levels():
+    # "go now " reaches "go now" at depth 1 and "go" > "now" at depth 2:
+    # the predictions are at depth 2, nothing below "now" is expanded
+    trie = ("", [
+        ("go now", [("fast", [])]),
+        ("go", [("now", [("later", [("end", [])])])]),
+    ])
+    expanded = []
+
+    def counting_children(node):
+        expanded.append(node[0])
+        return node[1]
+
+    nodes = shallowest_matches(trie, "go now ", counting_children, segment)
+    assert [n[0] for n in nodes] == ["fast"]
+    assert "later" not in expanded
+    assert shallowest(iter_matches(
+        trie, "go now ", children, segment, subtrees=False
+    )) == nodes
+
+
+@pytest.mark.parametrize(
+    "expected, token, prefix, distance",
+    [
+        ("show", "show", False, 0),
+        ("show", "shwo", False, 1),
+        ("show", "sho", False, 1),
+        ("show", "sho", True, 0),
+        ("interfaces", "intr", True, 1),
+        ("?", "anything", False, 0),
+        ("status", "version", False, 7),
+    ],
+)
+def test_edit_distance(expected, token, prefix, distance):
+    assert edit_distance(expected, token, 10, prefix) == distance
+
+
+def test_edit_distance_stops_over_budget():
+    assert edit_distance("status", "version", 1) > 1
+
+
+@pytest.mark.parametrize(
+    "input", ["", "show", "show ", "show -d x", "show -d x ", "sh x", "set"]
+)
+def test_fuzzy_without_edits_same_as_exact(input):
+    exact = list(iter_matches(TRIE, input, children, segment))
+    fuzzy = list(fuzzy_matches(TRIE, input, children, segment, 0))
+    assert fuzzy == [(node, depth, 0) for node, depth in exact]
+
+
+def test_fuzzy_matches():
+    matches = fuzzy_matches(TRIE, "shwo cnf", children, segment, 2,
+                            subtrees=False)
+    assert [(n[0], e) for n, _, e in matches] == [("config", 2)]
+    matches = fuzzy_matches(TRIE, "sey ", children, segment, 1)
+    assert [n[0] for n, _, _ in matches] == []
+    matches = fuzzy_matches(TRIE, "st", children, segment, 1,
+                            subtrees=False)
+    assert [(n[0], e) for n, _, e in matches] == [("show", 1), ("set", 1)]
@@ -17,3 +17,93 @@ def test_clear(my_parser: Parser):
     assert len(paths()) == 1
     clear()
     assert len(paths()) == 0
+
+
+def test_shipped_tables_match_grammar():
+    from ply import yacc
+    from pyrl_complete.parser import parsetab, rules
+    pinfo = yacc.ParserReflect(dict(vars(rules)))
+    pinfo.get_all()
+    # if this fails, regenerate the tables with parser.write_tables
+    assert pinfo.signature() == parsetab._lr_signature
+
+
+def test_engine_built_once(my_parser: Parser):
+    from pyrl_complete.parser.parser import _get_engine
+    my_parser.parse("get test;")
+    lexer, parser = _get_engine()
+    my_parser.parse("set test;")
+    assert _get_engine() == (lexer, parser)
+
+
+def test_no_files_written(my_parser: Parser, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    my_parser.parse("get test;")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_concurrent_parsing():
+    from concurrent.futures import ThreadPoolExecutor
+    import string
+
+    def grammar(i: int) -> str:
+        name = "".join(string.ascii_lowercase[int(d)] for d in str(i))
+        # a few statements per grammar, so parses overlap in time
+        return "\n".join(
+            f"cmd_{name} (a | b) [opt_{name}];" for _ in range(20)
+        ) + "\n"
+
+    def parse(i: int):
+        parser = Parser()
+        parser.parse(grammar(i))
+        return i, parser.paths
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(parse, range(200)))
+    for i, result in results:
+        expected = Parser()
+        expected.parse(grammar(i))
+        assert result == expected.paths
+        assert len(result) == 80
+
+
+def test_iter_paths(my_parser: Parser):
+    my_parser.parse("(one | two | three) [get | test];")
+    paths = my_parser.iter_paths()
+    assert next(paths) == ["one", "get"]
+    assert list(paths) == my_parser.paths[1:]
+
+
+def test_iter_paths_is_lazy(my_parser: Parser):
+    from itertools import islice
+    # 3^40 paths: only the ones consumed are ever built
+    my_parser.parse("cmd" + " [a | b]" * 40 + ";")
+    first = list(islice(my_parser.iter_paths(), 2))
+    assert first == [["cmd"] + ["a"] * 40, ["cmd"] + ["a"] * 39 + ["b"]]
+
+
+def test_update(my_parser: Parser):
+    my_parser.parse("get (one | two);\nset one;\nexit;\n")
+    assert my_parser.texts == ["get (one | two)", "set one", "exit"]
+    unchanged = my_parser.grammar.statements[0]
+    added, removed = my_parser.update(
+        "get (one | two);\nset (one | three);\nexit\n"
+    )
+    assert added == [["set", "one"], ["set", "three"]]
+    assert removed == [["set", "one"]]
+    # the statements that did not change are not parsed again
+    assert my_parser.grammar.statements[0] is unchanged
+    assert list(my_parser.paths) == [
+        ["get", "one"], ["get", "two"],
+        ["set", "one"], ["set", "three"],
+        ["exit"],
+    ]
+
+
+def test_update_from_empty(my_parser: Parser):
+    added, removed = my_parser.update("get | set; get | set")
+    assert added == [["get"], ["set"], ["get"], ["set"]]
+    assert removed == []
+    added, removed = my_parser.update("get | set")
+    assert added == []
+    assert removed == [["get"], ["set"]]
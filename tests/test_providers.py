@@ -0,0 +1,181 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+import pytest
+from pyrl_complete.parser import Parser, Providers, Tree
+
+RULES = """ssh ?host [-p ?port];
+cp ? ?dest;
+"""
+
+
+class Clock:
+    "A clock moved by hand"
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def providers():
+    providers = Providers(ttl=10, timeout=1)
+    yield providers
+    providers.close()
+
+
+@pytest.fixture()
+def tree():
+    parser = Parser()
+    parser.parse(RULES)
+    yield Tree(parser.iter_paths())
+
+
+def test_named_placeholders_in_rules(tree: Tree):
+    assert tree.get_predictions("ssh ") == ["ssh ?host"]
+    assert tree.get_predictions("ssh alpha -p 22 ") == ["ssh ?host -p ?port"]
+    assert tree.get_predictions("ssh alpha ") == ["ssh ?host"]
+    assert tree.get_predictions("cp a b") == ["cp ? ?dest"]
+
+
+def test_ttl_cache():
+    clock = Clock()
+    calls = []
+
+    def hosts():
+        calls.append(clock.now)
+        return ["alpha", "beta"]
+
+    providers = Providers(ttl=10, timeout=1, clock=clock)
+    providers.register("host", hosts)
+    assert providers.values("host") == ["alpha", "beta"]
+    clock.now = 5
+    assert providers.values("host") == ["alpha", "beta"]
+    assert calls == [0]
+    clock.now = 11
+    providers.values("host")
+    assert calls == [0, 11]
+    providers.close()
+    with pytest.raises(KeyError):
+        providers.values("port")
+
+
+def test_slow_provider_does_not_block():
+    release = threading.Event()
+    started = threading.Event()
+
+    def hosts():
+        yield "alpha"
+        started.set()
+        release.wait()
+        yield "beta"
+
+    providers = Providers(timeout=0)
+    providers.register("host", hosts)
+    assert providers.values("host") in ([], ["alpha"])
+    started.wait()
+    # the values yielded so far
+    assert providers.values("host") == ["alpha"]
+    release.set()
+    providers.close()
+    providers._executor.shutdown(wait=True)
+    assert providers.values("host") == ["alpha", "beta"]
+
+
+def test_one_wait_per_query():
+    release = threading.Event()
+
+    def slow():
+        release.wait()
+        return ["value"]
+
+    providers = Providers(timeout=0.05, max_workers=10)
+    for i in range(10):
+        providers.register(f"p{i}", slow)
+    tree = Tree([["cmd", f"?p{i}"] for i in range(10)])
+    tree.providers = providers
+    try:
+        start = time.perf_counter()
+        assert tree.get_predictions("cmd ") == [
+            f"cmd ?p{i}" for i in range(10)
+        ]
+        # no value has come yet
+        assert tree.complete_at("cmd ", 4) == []
+        # 0.05 s for each query, not for each provider
+        assert time.perf_counter() - start < 0.3
+    finally:
+        release.set()
+        providers.close()
+
+
+HUNG = """
+import threading
+from pyrl_complete.parser import Providers, Tree
+providers = Providers(timeout=0.01)
+providers.register("host", threading.Event().wait)
+tree = Tree([["ssh", "?host"]])
+tree.providers = providers
+print(tree.get_predictions("ssh "))
+providers.close()
+"""
+
+
+def test_hung_provider_does_not_block_exit():
+    start = time.perf_counter()
+    done = subprocess.run([sys.executable, "-c", HUNG], timeout=30,
+                          cwd=Path(__file__).parents[1],
+                          capture_output=True, text=True)
+    assert done.returncode == 0, done.stderr
+    assert done.stdout.strip() == "['ssh ?host']"
+    assert time.perf_counter() - start < 10
+
+
+def test_failed_fetch_keeps_values():
+    clock = Clock()
+    results = [["alpha"]]
+
+    def hosts():
+        if not results:
+            raise OSError("unreachable")
+        return results.pop()
+
+    providers = Providers(ttl=10, timeout=1, clock=clock)
+    providers.register("host", hosts)
+    assert providers.values("host") == ["alpha"]
+    clock.now = 20
+    assert providers.values("host") == ["alpha"]
+    providers.close()
+
+
+def test_expand(providers: Providers):
+    providers.register("host", lambda: ["alpha", "beta", "alps"])
+    assert providers.expand("ssh ?host", "ssh ") == ["ssh alpha", "ssh beta",
+                                                     "ssh alps"]
+    assert providers.expand("ssh ?host", "ssh al") == ["ssh alpha",
+                                                       "ssh alps"]
+    assert providers.expand("ssh ?host", "ssh zeta") == ["ssh zeta"]
+    assert providers.expand("ssh ?host -p ?port", "ssh Alpha ") == [
+        "ssh Alpha -p ?port"
+    ]
+    assert providers.expand("cp ? ?dest", "cp a") == ["cp a ?dest"]
+    assert providers.expand("ssh ?host", "") == ["ssh ?host"]
+
+
+def test_tree_with_providers(tree: Tree, providers: Providers):
+    providers.register("host", lambda: ["alpha", "beta"])
+    tree.providers = providers
+    assert tree.get_predictions("ssh ") == ["ssh alpha", "ssh beta"]
+    assert tree.get_predictions("ssh b") == ["ssh beta"]
+    assert tree.get_predictions("ssh ", limit=1) == ["ssh alpha"]
+    assert tree.get_predictions_many(["ssh ", "ssh b"]) == [
+        ["ssh alpha", "ssh beta"], ["ssh beta"]
+    ]
+    assert tree.session().get_predictions("ssh a") == ["ssh alpha"]
+    assert tree.complete_at("ssh ", 4) == ["alpha", "beta"]
+    assert tree.complete_at("ssh b -p 22", 4, 5) == ["beta"]
@@ -0,0 +1,130 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import pytest
+from pyrl_complete.parser import Parser, Tree, UsageRanking
+from pyrl_complete.parser.ranking import DAY
+
+
+class Clock:
+    "A clock moved by hand"
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock():
+    yield Clock()
+
+
+@pytest.fixture()
+def tree():
+    parser = Parser()
+    parser.parse("""show [config | interfaces] [-v];
+        set (user | group) -name ? [-id ?];
+        """)
+    yield Tree(parser.iter_paths())
+
+
+def test_accept_counts_prefixes(clock):
+    ranking = UsageRanking(clock=clock)
+    ranking.accept("set user -name ?")
+    ranking.accept("set group")
+    assert ranking.score("set") == pytest.approx(2)
+    assert ranking.score("set user") == pytest.approx(1)
+    assert ranking.score("set  user -name ?") == pytest.approx(1)
+    assert ranking.score("show") == 0
+
+
+def test_decay(clock):
+    ranking = UsageRanking(half_life=DAY, clock=clock)
+    ranking.accept("show config")
+    clock.now += DAY
+    assert ranking.score("show config") == pytest.approx(0.5)
+    ranking.accept("show interfaces")
+    # a recent use outranks an older one
+    assert ranking.top(["show config", "show interfaces"]) == [
+        "show interfaces", "show config"
+    ]
+    # far in the future the weights are rebased, the order is kept
+    clock.now += 100 * DAY
+    ranking.accept("show interfaces")
+    assert ranking.epoch == clock.now
+    assert ranking.score("show interfaces") == pytest.approx(1)
+    assert "show config" not in ranking.scores
+
+
+def test_long_idle_gap(clock, tmp_path):
+    ranking = UsageRanking(half_life=60, clock=clock)
+    ranking.accept("show config")
+    path = str(tmp_path / "usage.json")
+    ranking.save(path)
+    # far more half-lives than a float weight can take
+    clock.now += 2000 * 60
+    assert ranking.score("show config") == 0
+    ranking.accept("show interfaces")
+    assert ranking.score("show interfaces") == pytest.approx(1)
+    assert "show config" not in ranking.scores
+    loaded = UsageRanking.load(path, clock=clock)
+    loaded.accept("show interfaces")
+    assert loaded.scores == {
+        "show": pytest.approx(1), "show interfaces": pytest.approx(1)
+    }
+
+
+def test_top_k(clock):
+    ranking = UsageRanking(clock=clock)
+    for expression, uses in [("a", 1), ("b", 3), ("c", 2)]:
+        for _ in range(uses):
+            ranking.accept(expression)
+    assert ranking.top(["a", "b", "c", "d"], 2) == ["b", "c"]
+    # unused expressions keep their order
+    assert ranking.top(["e", "d", "a"]) == ["a", "e", "d"]
+
+
+def test_ranked_predictions(tree: Tree, clock):
+    assert tree.get_predictions("show ") == [
+        "show config", "show interfaces", "show -v"
+    ]
+    tree.ranking = UsageRanking(clock=clock)
+    tree.ranking.accept("show interfaces -v")
+    assert tree.get_predictions("show ") == [
+        "show interfaces", "show config", "show -v"
+    ]
+    assert tree.get_predictions("show ", limit=1) == ["show interfaces"]
+    assert tree.session().get_predictions("show ") == [
+        "show interfaces", "show config", "show -v"
+    ]
+    assert tree.get_predictions_many(["show ", "sh"]) == [
+        tree.get_predictions("show "), tree.get_predictions("sh")
+    ]
+
+
+def test_tree_accept_fills_placeholders(tree: Tree, clock):
+    tree.ranking = UsageRanking(clock=clock)
+    tree.accept("set user -name bob")
+    tree.accept("Set group  -name eve -id 12")
+    tree.accept("set group -name eve")
+    assert tree.ranking.score("set user -name ?") == pytest.approx(1)
+    assert tree.ranking.score("set group -name ? -id ?") == pytest.approx(1)
+    assert tree.ranking.score("set group") == pytest.approx(2)
+    assert tree.ranking.score("set") == pytest.approx(3)
+    assert tree.ranking.score("set user -name bob") == 0
+    assert tree.get_predictions("set ") == ["set group", "set user"]
+    # a line the tree does not reach is counted as it is
+    tree.accept("reboot now")
+    assert tree.ranking.score("reboot now") == pytest.approx(1)
+
+
+def test_save_and_load(tmp_path, clock):
+    ranking = UsageRanking(half_life=DAY, clock=clock)
+    ranking.accept("set user -name ?")
+    path = str(tmp_path / "usage.json")
+    ranking.save(path)
+    clock.now += DAY
+    loaded = UsageRanking.load(path, clock=clock)
+    assert loaded.half_life == DAY
+    assert loaded.score("set user") == pytest.approx(0.5)
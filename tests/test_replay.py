@@ -0,0 +1,39 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import json
+import pytest
+from pyrl_complete.apps.compiler import compile_rules
+from pyrl_complete.apps.replay import load_tree, main
+
+RULES = """get (status | version) [-v];
+set (user | group) -name ? [-id ?];
+exit;
+"""
+CORPUS = ["get ", "set user -name bob ", "", "zz", "set group -name x -i",
+          "get status -v", "exit"]
+
+
+@pytest.fixture()
+def rules(tmp_path):
+    path = tmp_path / "rules.prl"
+    path.write_text(RULES)
+    yield path
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_replay_command(rules, tmp_path, capsys, compiled):
+    if compiled:
+        compile_rules(str(rules), str(tmp_path / "rules.prlc"))
+        rules = tmp_path / "rules.prlc"
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text("\n".join(CORPUS) + "\n")
+    output = tmp_path / "out.jsonl"
+    main([str(rules), str(corpus), "-o", str(output), "--workers", "2",
+          "--chunk-size", "2", "--suggestions"])
+    assert "7 lines replayed" in capsys.readouterr().err
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    tree = load_tree(str(rules))
+    assert [r["input"] for r in records] == CORPUS
+    for record in records:
+        assert record["predictions"] == tree.get_predictions(record["input"])
+        assert record["suggestions"] == tree.get_suggestions(record["input"])
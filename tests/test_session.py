@@ -0,0 +1,97 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import pytest
+from pyrl_complete.parser import Parser, Tree
+from pyrl_complete.parser.session import CompletionSession
+
+RULES = """get (status | version) [-v];
+set (user | group) -name ? [-id ?] [-f];
+show [config | interfaces] [-v];
+secret_wallet get -d ? -a ? end;
+"""
+
+
+@pytest.fixture()
+def tree():
+    parser = Parser()
+    parser.parse(RULES)
+    yield Tree(parser.iter_paths())
+
+
+def keystrokes(line: str):
+    return [line[:i] for i in range(len(line) + 1)]
+
+
+@pytest.mark.parametrize(
+    "line",
+    ["set user -name bob -id 12 -f", "secret_wallet get -d a -a b end",
+     "show config -v", "get  status"],
+)
+def test_typing_same_as_tree(tree: Tree, line: str):
+    session = tree.session()
+    for input in keystrokes(line):
+        assert session.get_predictions(input) == tree.get_predictions(input)
+        assert session.get_suggestions(input) == tree.get_suggestions(input)
+
+
+def test_multi_token_option_keeps_tree_order():
+    # "-p ?" is decided one token later than its placeholder sibling, and
+    # must not move ahead of it in the reused frontier
+    parser = Parser()
+    parser.parse("scp ? ?; scp -p ? ? ?;")
+    tree = Tree(parser.iter_paths())
+    session = tree.session()
+    for input in keystrokes("scp -p 22 a "):
+        assert session.get_predictions(input) == tree.get_predictions(input)
+        assert session.get_suggestions(input) == tree.get_suggestions(input)
+    assert session.get_suggestions("scp -p 22 ") == [
+        "scp ? ?", "scp -p ?", "scp -p ? ?", "scp -p ? ? ?"
+    ]
+
+
+def test_backspace_and_edits(tree: Tree):
+    session = CompletionSession(tree)
+    inputs = ["set user -name x ", "set user -na", "set group ", "sh",
+              "show ", "", " ", "set user -name x -id y "]
+    for input in inputs:
+        assert session.get_predictions(input) == tree.get_predictions(input)
+
+
+def test_frontier_is_reused(tree: Tree):
+    session = tree.session()
+    session.get_predictions("set user -name bob ")
+    frontier = session._frontier
+    session.get_predictions("set user -name bob -i")
+    assert session._frontier is frontier
+    session.get_predictions("set user -name bob -id ")
+    assert session._frontier is not frontier
+
+
+def test_tree_change_resets_session(tree: Tree):
+    session = tree.session()
+    assert session.get_predictions("get ") == ["get status", "get version"]
+    tree.patch(added=[["get", "config"]], removed=[])
+    assert session.get_predictions("get ") == [
+        "get status", "get version", "get config"
+    ]
+
+
+def test_session_limit(tree: Tree):
+    session = tree.session()
+    assert session.get_suggestions("s", limit=3) == tree.get_suggestions(
+        "s", limit=3
+    )
+    assert list(session.iter_predictions("set ")) == tree.get_predictions(
+        "set "
+    )
+    assert session.get_predictions("set ", limit=1) == ["set user"]
+
+
+def test_complete_at_same_as_tree(tree: Tree):
+    session = CompletionSession(tree)
+    line = "set user -name bob -id 12 -f"
+    for i in range(len(line) + 1):
+        begidx = line.rfind(" ", 0, i) + 1
+        assert session.complete_at(line, begidx, i) == (
+            tree.complete_at(line, begidx, i)
+        )
@@ -0,0 +1,66 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import multiprocessing
+import pytest
+from pyrl_complete.parser import CompactTree, Parser, SharedTree, Tree
+
+RULES = """get (status | version);
+set (user | group) -name ? [-id ?];
+show [config | interfaces] [-v];
+"""
+
+
+@pytest.fixture()
+def tree():
+    parser = Parser()
+    parser.parse(RULES)
+    yield Tree(parser.iter_paths())
+
+
+@pytest.fixture()
+def shared(tree: Tree):
+    shared = SharedTree.create(tree)
+    yield shared
+    shared.close()
+    shared.unlink()
+
+
+def _predictions(args):
+    name, input = args
+    with SharedTree(name) as tree:
+        return tree.get_predictions(input)
+
+
+@pytest.mark.parametrize(
+    "input", ["", "g", "set user -name x ", "show ", "zz"]
+)
+def test_attached_same_as_tree(tree: Tree, shared: SharedTree, input):
+    with SharedTree(shared.shm_name) as attached:
+        assert len(attached) == len(shared)
+        assert attached.get_suggestions(input) == tree.get_suggestions(input)
+        assert attached.get_predictions(input) == tree.get_predictions(input)
+
+
+def test_create_from_compact_tree(tree: Tree):
+    shared = SharedTree.create(CompactTree.from_tree(tree))
+    try:
+        assert shared.get_predictions("set ") == tree.get_predictions("set ")
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+def test_workers_attach(shared: SharedTree):
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(2) as pool:
+        results = pool.map(
+            _predictions, [(shared.shm_name, "get "), (shared.shm_name, "s")]
+        )
+    assert results == [["get status", "get version"], ["set", "show"]]
+    # the workers exiting does not free the memory
+    assert shared.get_predictions("get ") == ["get status", "get version"]
+
+
+def test_attach_missing():
+    with pytest.raises(FileNotFoundError):
+        SharedTree("pyrl_no_such_tree")
@@ -0,0 +1,68 @@
+# Copyright (C) 2025 codimoc, codimoc@prismoid.uk
+
+import threading
+from pyrl_complete.parser import Parser, SnapshotTree, Tree
+
+RULES = """get (status | version) [-v];
+set (user | group) -name ? [-id ?];
+"""
+NEW_RULES = """get (status | config) [-v];
+show [interfaces];
+"""
+
+
+def paths(rules: str):
+    parser = Parser()
+    parser.parse(rules)
+    return list(parser.iter_paths())
+
+
+def test_queries_and_cache():
+    live = SnapshotTree(paths(RULES))
+    tree = Tree(paths(RULES))
+    assert live.get_suggestions("get ") == tree.get_suggestions("get ")
+    assert live.get_predictions("set user ") == ["set user -name ?"]
+    assert live.get_predictions("get ", limit=1) == ["get status"]
+    snapshot = live.snapshot
+    assert "set user " in snapshot.caches["predictions"]
+    # the cached results are not shared with the caller
+    live.get_predictions("set user ").append("x")
+    assert live.get_predictions("set user ") == ["set user -name ?"]
+
+
+def test_reload_swaps_snapshot():
+    live = SnapshotTree(paths(RULES))
+    old = live.snapshot
+    new = live.reload_rules(NEW_RULES)
+    assert live.snapshot is new and new.version == old.version + 1
+    assert live.get_predictions("get ") == ["get status", "get config"]
+    # readers holding the old snapshot still see the old grammar
+    assert old.get_predictions("get ") == ["get status", "get version"]
+    live.reload_tree(Tree(paths(RULES)))
+    assert live.snapshot.version == 2
+    assert live.get_predictions("s") == ["set"]
+
+
+def test_concurrent_reads_and_reloads():
+    live = SnapshotTree(paths(RULES))
+    expected = {
+        tuple(Tree(paths(r)).get_suggestions("g")) for r in (RULES, NEW_RULES)
+    }
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            result = tuple(live.get_suggestions("g"))
+            if result not in expected:
+                errors.append(result)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for r in readers:
+        r.start()
+    for i in range(20):
+        live.reload(paths(NEW_RULES if i % 2 else RULES))
+    stop.set()
+    for r in readers:
+        r.join()
+    assert errors == []
@@ -156,6 +156,9 @@ def test_find_all_char_positions(text, char_to_find, expected):
         ),
         # Multiple placeholders, but input string ends before the last one
         ("first ? second ? third ?", "first one second", "first one second ? third ?"),
+        # Named placeholders are replaced with their name
+        ("ssh ?host -p ?port", "ssh alpha -p 22", "ssh alpha -p 22"),
+        ("ssh ?host -p ?port", "ssh alpha", "ssh alpha -p ?port"),
     ],
 )
 def test_fill_placeholders_with_words(prediction, input_str, expected):
@@ -1,7 +1,8 @@
 # Copyright (C) 2025 codimoc, codimoc@prismoid.uk
 
-from pyrl_complete.parser import Node, Tree
+from pyrl_complete.parser import Node, Parser, Tree
 from pyrl_complete.parser.rules import Paths
+import pytest
 
 
 def test_simple_tree():
@@ -192,7 +193,7 @@ def test_tree_init():
     assert tree.root is not None
     assert tree.root.name == "root"
     assert tree.root.parent is None
-    assert tree.cache == {}
+    assert len(tree.cache) == 0
 
     # Check if tree is populated correctly
     assert "cmd1" in tree.root.children
@@ -458,3 +459,339 @@ def test_tree_get_prediction_with_options_with_placeholders():
     assert predictions == ["show one ? two ?"]
     predictions = tree.get_predictions("show one domain two access")
     assert predictions == ["show one ? two ?"]
+
+
+def test_tree_from_iterator():
+    """Tests building a tree from a generator of paths"""
+    paths = (["cmd", f"sub{i}"] for i in range(100))
+    tree = Tree(paths)
+    assert len(tree.root.children) == 1
+    assert len(tree.root.children["cmd"].children) == 100
+
+
+def test_tree_patch():
+    """Tests adding and removing paths in place"""
+    tree = Tree([["get", "one"], ["get", "two"], ["set", "one"]])
+    assert tree.root.count == 3
+    assert tree.root.children["get"].count == 2
+    tree.get_predictions("get ")
+    tree.get_predictions("set ")
+    tree.patch(added=[["set", "two"]], removed=[["get", "two"]])
+    assert "two" not in tree.root.children["get"].children
+    assert "two" in tree.root.children["set"].children
+    # only the entries involving the changed nodes are dropped
+    assert "get " not in tree.prediction_cache
+    assert "set " not in tree.prediction_cache
+    assert tree.get_predictions("set ") == ["set one", "set two"]
+    tree.patch(added=[], removed=[["get", "one"]])
+    assert "get" not in tree.root.children
+    assert tree.root.count == 2
+
+
+def test_tree_patch_keeps_unrelated_cache():
+    tree = Tree([["get", "one"], ["set", "one"]])
+    tree.get_predictions("get ")
+    tree.patch(added=[["set", "two"]], removed=[])
+    assert "get " in tree.prediction_cache
+
+
+def test_tree_patch_shared_paths():
+    """A node stays as long as a path goes through it"""
+    tree = Tree([["get", "one"], ["get", "one"]])
+    tree.patch(added=[], removed=[["get", "one"]])
+    assert "one" in tree.root.children["get"].children
+    with pytest.raises(KeyError):
+        tree.patch(added=[], removed=[["get", "two"]])
+
+
+def test_tree_patch_same_as_rebuild():
+    parser = Parser()
+    parser.parse("get (one | two) [-v];\nset (a | b) -x ?\n")
+    tree = Tree(parser.iter_paths())
+    added, removed = parser.update("get (one | three) [-v];\nset (a | b) -x ?\n")
+    tree.patch(added, removed)
+    assert sorted(tree.get_suggestions("")) == sorted(
+        Tree(parser.paths).get_suggestions("")
+    )
+
+
+def _all_nodes(node: Node):
+    yield node
+    for child in node.children.values():
+        yield from _all_nodes(child)
+
+
+def test_find_matching_nodes_same_as_full_scan():
+    """The descent finds the same nodes as matching every node"""
+    parser = Parser()
+    parser.parse("""get (status | version) [-v];
+        set (user | group) -name ? [-id ?] [-f];
+        show [config | interfaces] [-v];
+        secret_wallet get -d ? -a ? end;
+        """)
+    tree = Tree(parser.iter_paths())
+    inputs = set()
+    for node in _all_nodes(tree.root):
+        exp = node.expression().replace("?", "val")
+        for i in range(len(exp) + 1):
+            inputs.add(exp[:i])
+            inputs.add(exp[:i] + " ")
+            inputs.add(exp[:i] + "  ")
+    for input in inputs:
+        expected = [n for n in _all_nodes(tree.root) if n.matches(input)]
+        assert tree.find_matching_nodes(input) == expected, input
+
+
+def test_node_precomputed_fields():
+    """Depth and expression are set at insertion"""
+    tree = Tree([["set", "-d ?", "-a ?"]])
+    node = tree.root.children["set"].children["-d ?"].children["-a ?"]
+    assert node.depth == 3
+    assert node.segment == ("-a", "?")
+    assert node.expression() == "set -d ? -a ?"
+    assert node._tokens() == ("set", "-d", "?", "-a", "?")
+    # nodes have no __dict__, only slots
+    assert not hasattr(node, "__dict__")
+
+
+def test_matches_placeholder_dense():
+    """Placeholders match any word, literal tokens are compared in order"""
+    tree = Tree([["add", "-name ?", "-id ?", "-host ?"]])
+    node = tree.root.children["add"].children["-name ?"].children["-id ?"]
+    node = node.children["-host ?"]
+    assert node.matches("add -name a -id 2 -host h")
+    assert node.matches("add -name a -id 2 -host h ")
+    assert node.matches("add  -name a   -id 2 -h")
+    assert node.matches("ADD -name A -id 2 -host")
+    assert not node.matches("add -name a -host h")
+    assert not node.matches("add -name a -id 2 -host h x")
+    assert not node.matches(" add -name a")
+    assert not node.matches("add -name -id 2")
+
+
+def test_node_named_root():
+    """Only the node without parent is the root"""
+    tree = Tree([["cmd", "root"]])
+    node = tree.root.children["cmd"].children["root"]
+    assert node.expression() == "cmd root"
+    assert tree.get_predictions("cmd r") == ["cmd root"]
+
+
+def test_suggestions_limit():
+    paths = [["cmd", f"sub{i}", "end"] for i in range(10)]
+    tree = Tree(paths)
+    everything = tree.get_suggestions("cmd ")
+    assert len(everything) == 20
+    tree.cache.clear()
+    assert tree.get_suggestions("cmd ", limit=3) == everything[:3]
+    assert tree.get_suggestions("cmd ", limit=0) == []
+    assert tree.get_predictions("cmd ", limit=2) == ["cmd sub0", "cmd sub1"]
+    assert tree.get_predictions("cmd ", limit=100) == tree.get_predictions(
+        "cmd "
+    )
+
+
+def test_iter_suggestions_is_lazy():
+    paths = [["cmd", f"sub{i}", "end"] for i in range(10)]
+    tree = Tree(paths)
+    suggestions = tree.iter_suggestions("cmd ")
+    assert next(suggestions) == "cmd sub0"
+    suggestions.close()
+    # a partial read is not cached
+    assert "cmd " not in tree.cache
+    assert list(tree.iter_suggestions("cmd ")) == tree.get_suggestions("cmd ")
+    assert "cmd " in tree.cache
+    assert list(tree.iter_suggestions("cmd s", tree.root.children["cmd"])) == [
+        "cmd sub0", "cmd sub0 end", "cmd sub1", "cmd sub1 end",
+        "cmd sub2", "cmd sub2 end", "cmd sub3", "cmd sub3 end",
+        "cmd sub4", "cmd sub4 end", "cmd sub5", "cmd sub5 end",
+        "cmd sub6", "cmd sub6 end", "cmd sub7", "cmd sub7 end",
+        "cmd sub8", "cmd sub8 end", "cmd sub9", "cmd sub9 end",
+    ]
+
+
+def test_many_same_as_one_at_a_time():
+    parser = Parser()
+    parser.parse("""get (status | version) [-v];
+        set (user | group) -name ? [-id ?] [-f];
+        show [config | interfaces] [-v];
+        secret_wallet get -d ? -a ? end;
+        """)
+    tree = Tree(parser.iter_paths())
+    lines = ["set user -name bob -id 12 -f", "secret_wallet get -d a -a b end",
+             "show config -v", "get  status", "set group -name x"]
+    inputs = [line[:i] for line in lines for i in range(len(line) + 1)]
+    inputs += ["", " ", "zz ", "set user -name bob -id 12 -f"]
+    assert tree.get_predictions_many(inputs) == [
+        tree.get_predictions(i) for i in inputs
+    ]
+    assert tree.get_suggestions_many(iter(inputs)) == [
+        tree.get_suggestions(i) for i in inputs
+    ]
+    assert tree.get_predictions_many([]) == []
+
+
+def test_many_full_lines_same_as_one_at_a_time():
+    parser = Parser()
+    parser.parse("scp ? ?; scp -p ? ? ?; scp -r ? ?;")
+    tree = Tree(parser.iter_paths())
+    lines = ["scp -p 22 ", "scp -p 22 a ", "scp -r ", "scp a ", "scp -p ",
+             "scp -p 22 a b"]
+    assert tree.get_suggestions_many(lines) == [
+        tree.get_suggestions(line) for line in lines
+    ]
+    assert tree.get_predictions_many(lines) == [
+        tree.get_predictions(line) for line in lines
+    ]
+
+
+def test_fuzzy_predictions():
+    parser = Parser()
+    parser.parse("""show [config | interfaces] [-v];
+        set (user | group) -name ? [-id ?];
+        get (status | version);
+        """)
+    tree = Tree(parser.iter_paths())
+    assert tree.get_predictions("shwo int") == []
+    assert tree.get_predictions("shwo int", max_edits=1) == [
+        "show interfaces"
+    ]
+    assert tree.get_predictions("set usr -nme bob ", max_edits=2) == (
+        tree.get_predictions("set user -name bob ")
+    )
+    # ranked by edits: the exact predictions first
+    assert tree.get_predictions("gte ", max_edits=2) == [
+        "get status", "get version", "set user", "set group"
+    ]
+    assert tree.get_predictions("get ", max_edits=1, limit=2) == (
+        tree.get_predictions("get ")
+    )
+    assert tree.get_suggestions("shwo c", max_edits=1) == [
+        "show config", "show config -v"
+    ]
+    # fuzzy results are not cached
+    assert "shwo c" not in tree.cache
+
+
+def test_add_and_remove_path():
+    tree = Tree([["get", "one"], ["set", "one"]])
+    tree.get_predictions("get ")
+    tree.get_predictions("pl")
+    tree.add_path(["plugin", "run", "-f ?"])
+    assert "get " in tree.prediction_cache
+    assert "pl" not in tree.prediction_cache
+    assert tree.get_predictions("pl") == ["plugin"]
+    assert tree.get_predictions("plugin run ") == ["plugin run -f ?"]
+    tree.remove_path(["plugin", "run", "-f ?"])
+    assert "plugin" not in tree.root.children
+    assert "get " in tree.prediction_cache
+    assert tree.get_predictions("pl") == []
+    with pytest.raises(KeyError):
+        tree.remove_path(["plugin", "run"])
+
+
+def test_prune():
+    tree = Tree([["get", "one"], ["plugin", "run"], ["plugin", "stop", "-f"],
+                 ["plugin", "stop"]])
+    tree.get_predictions("get ")
+    tree.get_predictions("plugin ")
+    assert tree.prune(["plugin", "stop"]) == 2
+    assert tree.root.count == 2
+    assert tree.root.children["plugin"].count == 1
+    assert "plugin " not in tree.prediction_cache
+    assert "get " in tree.prediction_cache
+    assert tree.get_predictions("plugin ") == ["plugin run"]
+    assert tree.prune(["plugin", "run"]) == 1
+    assert "plugin" not in tree.root.children
+    with pytest.raises(KeyError):
+        tree.prune(["plugin"])
+    assert tree.prune([]) == 1
+    assert tree.get_suggestions("") == [""]
+
+
+def test_add_paths_from_rules():
+    tree = Tree([["get", "one"]])
+    tree.get_predictions("get ")
+    assert tree.add_paths_from_rules("plugin (run | stop) [-f ?];") == 4
+    assert tree.root.count == 5
+    assert "get " in tree.prediction_cache
+    assert tree.get_predictions("plugin ") == ["plugin run", "plugin stop"]
+
+
+@pytest.mark.parametrize(
+    "line, begidx, endidx, expected",
+    [
+        ("", 0, None, ["get", "set"]),
+        ("g", 0, None, ["get"]),
+        ("get ", 4, None, ["status", "version"]),
+        ("get st", 4, None, ["status"]),
+        ("set user -n", 9, None, ["-name"]),
+        ("set user -name bob ", 19, None, ["-id"]),
+        # mid-line: the words after the cursor are left alone
+        ("set gr -name bob", 4, 6, ["group"]),
+        ("get st -v", 4, 6, ["status"]),
+        # readline splitting words on "-" as well
+        ("set user -name bob -", 20, None, ["id"]),
+        # nothing to complete at a placeholder without a provider
+        ("set user -name ", 15, None, []),
+        ("zz ", 3, None, []),
+    ],
+)
+def test_complete_at(line, begidx, endidx, expected):
+    parser = Parser()
+    parser.parse("""get (status | version) [-v];
+        set (user | group) -name ? [-id ?];
+        """)
+    tree = Tree(parser.iter_paths())
+    assert tree.complete_at(line, begidx, endidx) == expected
+
+
+def test_remove_path_only_prefix():
+    tree = Tree([["a", "b", "c"], ["a", "b", "d"], ["x"]])
+    with pytest.raises(KeyError):
+        tree.remove_path(["a", "b"])
+    assert tree.root.count == 3
+    assert tree.root.children["a"].count == 2
+    assert tree.root.children["a"].children["b"].count == 2
+    tree.remove_path(["a", "b", "c"])
+    assert tree.get_suggestions("a ") == ["a b", "a b d"]
+    assert tree.root.count == 2
+    # a path that is also the prefix of another one can be removed
+    tree.add_path(["a", "b"])
+    tree.remove_path(["a", "b"])
+    assert tree.get_suggestions("a ") == ["a b", "a b d"]
+    assert tree.root.children["a"].children["b"].count == 1
+
+
+def test_lookup_index_follows_changes():
+    # wide enough for the children of the root to be indexed
+    paths = [[f"cmd{c}", "run"] for c in "abcdefghij"] + [["?", "any"]]
+    tree = Tree(paths)
+    assert tree.get_suggestions("cmdc ") == ["cmdc run", "?", "? any"]
+    assert tree.root._index is not None
+    tree.add_path(["cmdc", "stop"])
+    tree.add_path(["cmdz", "run"])
+    assert tree.get_suggestions("cmdc ") == [
+        "cmdc run", "cmdc stop", "?", "? any"
+    ]
+    # added after the placeholder, so it comes after it in preorder
+    assert tree.get_suggestions("cmdz ") == ["?", "? any", "cmdz run"]
+    tree.remove_path(["cmdz", "run"])
+    tree.prune(["?"])
+    assert tree.get_suggestions("cmdz ") == []
+    assert tree.get_suggestions("cmdc ") == ["cmdc run", "cmdc stop"]
+
+
+def test_patch_is_atomic():
+    tree = Tree([["get", "one"], ["get", "two"], ["set", "x"]])
+    session = tree.session()
+    assert tree.get_predictions("get ") == ["get one", "get two"]
+    with pytest.raises(KeyError):
+        tree.patch([], [["get", "one"], ["nope"]])
+    # removed twice, but in the tree once
+    with pytest.raises(KeyError):
+        tree.patch([["new"]], [["get", "one"], ["get", "one"]])
+    assert tree.version == 0
+    assert tree.get_predictions("get ") == ["get one", "get two"]
+    assert session.get_predictions("get ") == ["get one", "get two"]
+    assert tree.get_suggestions("n") == []